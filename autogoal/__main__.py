@@ -18,7 +18,7 @@ from autogoal.contrib import (
     ContribStatus,
     download as download_contrib,
 )
-from autogoal.kb import VectorCategorical
+from autogoal.kb import SemanticType, VectorCategorical
 from autogoal.ml import AutoML
 from autogoal.search import RichLogger
 from autogoal.utils import Gb, Min, inspect_storage, run
@@ -198,10 +198,13 @@ def automl_fit(
 
     columns = [c for c in dataset.columns if c != target]
 
+    # The input type is inferred per column, before mixing them in a single array
+    input_type = SemanticType.infer(dataset[columns])
     X = dataset[columns].values
     y = dataset[target].values
 
     automl = AutoML(
+        input=input_type,
         output=VectorCategorical(),
         search_kwargs=dict(
             evaluation_timeout=evaluation_timeout,
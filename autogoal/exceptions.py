@@ -2,3 +2,16 @@ class InterfaceIncompatibleError(ValueError):
     def __init__(self, cls) -> None:
         super().__init__(f"Cannot find compatible implementations for <class {cls}>")
         self.cls = cls
+
+
+class PrunedEvaluation(Exception):
+    """
+    Raised by a fitness function that stops evaluating a candidate early,
+    because it can no longer beat the best fitness found so far.
+
+    The `fitness` attribute holds the (partial) fitness computed before stopping.
+    """
+
+    def __init__(self, fitness) -> None:
+        super().__init__(f"Evaluation pruned with partial fitness={fitness}")
+        self.fitness = fitness
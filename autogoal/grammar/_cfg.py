@@ -1,3 +1,4 @@
+import functools
 import inspect
 from typing import List, Dict, Set
 
@@ -80,7 +81,8 @@ class OneOf(Production):
             raise ValueError("Max iterations exceeded")
 
         option = sampler.choice(self.options, handle=self.head.name)
-        return self.grammar[option].sample(sampler, namespace, max_iterations - 1)
+        production = self.grammar.production(option)
+        return production.sample(sampler, namespace, max_iterations - 1)
 
 
 class SubsetOf(Production):
@@ -127,7 +129,7 @@ class SubsetOf(Production):
             for option in self.options:
                 if hasattr(option, "name"):
                     handle = self.head.name + "_" + option.name
-                    sample = self.grammar[option].sample(
+                    sample = self.grammar.production(option).sample(
                         sampler, namespace, max_iterations - 1
                     )
                 else:
@@ -184,7 +186,7 @@ class Callable(Production):
 
         for arg, symbol in self._parameters.items():
             if isinstance(symbol, Symbol):
-                arg_value = self.grammar[symbol].sample(
+                arg_value = self.grammar.production(symbol).sample(
                     sampler, namespace, max_iterations - 1
                 )
             else:
@@ -219,6 +221,8 @@ class ContextFreeGrammar(Grammar):
         super(ContextFreeGrammar, self).__init__(start)
         self._namespace = {} if namespace is None else namespace
         self._productions: Dict[Symbol, Production] = {}
+        # Productions by symbol name, hashing a `Symbol` is too slow for sampling
+        self._links: Dict[str, Production] = {}
 
     @property
     def namespace(self):
@@ -231,12 +235,20 @@ class ContextFreeGrammar(Grammar):
             )
 
         self._productions[symbol] = production
+        self._links[symbol.name] = production
 
     def replace(self, symbol: Symbol, production: Production) -> None:
         if symbol not in self:
             raise ValueError("Symbol is not defined, call Grammar.add() instead.")
 
         self._productions[symbol] = production
+        self._links[symbol.name] = production
+
+    def production(self, symbol: Symbol) -> Production:
+        """
+        Same as `grammar[symbol]`, but faster, to be used while sampling.
+        """
+        return self._links[symbol.name]
 
     def __contains__(self, symbol: Symbol):
         return symbol in self._productions
@@ -254,7 +266,7 @@ class ContextFreeGrammar(Grammar):
         return "\n".join(code)
 
     def _sample(self, symbol, max_iterations, sampler):
-        production = self[symbol]
+        production = self.production(symbol)
         return production.sample(sampler, self._namespace, max_iterations)
 
 
@@ -283,9 +295,31 @@ def generate_cfg(cls, registry=None) -> ContextFreeGrammar:
     <MyClass_x> := discrete (min=1, max=3)
     <MyClass_y> := continuous (min=0, max=1)
 
+    ```
+
+    Grammars are cached for the whole process by class and registry, so the same
+    instance is returned every time (and must not be modified):
+
+    ```python
+    >>> generate_cfg(MyClass) is grammar
+    True
+
     ```
     """
-    return _generate_cfg(cls, registry=registry)
+    try:
+        key = (cls, tuple(registry or ()))
+        grammar = _GRAMMARS.get(key)
+    except TypeError:
+        # Unhashable callables or registries are not cached
+        return _generate_cfg(cls, registry=registry)
+
+    if grammar is None:
+        grammar = _GRAMMARS[key] = _generate_cfg(cls, registry=registry)
+
+    return grammar
+
+
+_GRAMMARS: Dict[tuple, ContextFreeGrammar] = {}
 
 
 def _generate_cfg(
@@ -311,15 +345,7 @@ def _generate_cfg(
     grammar.add(symbol, Empty(symbol, grammar))
     parameters = {}
 
-    if inspect.isclass(cls):
-        if getattr(cls, "get_inner_signature", None):
-            signature = cls.get_inner_signature()
-        else:
-            signature = inspect.signature(cls.__init__)
-    elif inspect.isfunction(cls):
-        signature = inspect.signature(cls)
-    else:
-        raise ValueError("Unable to obtain signature for %r" % cls)
+    signature = _signature(cls)
 
     for param_name, param_obj in signature.parameters.items():
         if param_name in ["self", "args", "kwargs"]:
@@ -358,6 +384,20 @@ def _generate_cfg(
     return grammar
 
 
+@functools.lru_cache(maxsize=None)
+def _signature(cls):
+    if inspect.isclass(cls):
+        if getattr(cls, "get_inner_signature", None):
+            return cls.get_inner_signature()
+
+        return inspect.signature(cls.__init__)
+
+    if inspect.isfunction(cls):
+        return inspect.signature(cls)
+
+    raise ValueError("Unable to obtain signature for %r" % cls)
+
+
 class DiscreteValue:
     def __init__(self, min, max):
         self.min = min
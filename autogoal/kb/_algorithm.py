@@ -1,3 +1,4 @@
+import collections
 from collections import namedtuple
 import inspect
 import abc
@@ -11,13 +12,23 @@ import types
 import pickle
 import os
 import shutil
+import copy
+import copyreg
+import functools
 
 import networkx as nx
 from autogoal.utils import nice_repr
 from autogoal.grammar import Graph, GraphSpace, generate_cfg
-from autogoal.kb._semantics import SemanticType, Seq
+from autogoal.sampling import ReplaySampler
+from autogoal.kb._semantics import SemanticType, Seq, TypeLattice
 from autogoal.contrib import find_classes
-from autogoal.utils import AlgorithmConfig, get_contrib, generate_installer
+from autogoal.utils import (
+    AlgorithmConfig,
+    StepCache,
+    StepProfile,
+    get_contrib,
+    generate_installer,
+)
 
 # from autogoal.experimental import generate_requirements
 
@@ -68,31 +79,9 @@ def algorithm(*annotations):
 
     *inputs, output = annotations
 
-    def match(cls):
-        if not hasattr(cls, "run"):
-            return False
-
-        signature = inspect.signature(cls.run)
-        input_types = [
-            v.annotation for k, v in signature.parameters.items() if k != "self"
-        ]
-        output_type = signature.return_annotation
-
-        if len(inputs) != len(input_types):
-            return False
-
-        for expected, real in zip(inputs, input_types):
-            if not issubclass(expected, real):
-                return False
-
-        if not issubclass(output_type, output):
-            return False
-
-        return True
-
     @classmethod
     def is_compatible(cls, other):
-        return match(other)
+        return _algorithm_matches(tuple(inputs), output, other)
 
     @classmethod
     def generate_cfg(cls, grammar, head):
@@ -117,6 +106,30 @@ def algorithm(*annotations):
     return types.new_class(f"Algorithm[{inputs},{output}]", bases=(), exec_body=build)
 
 
+@functools.lru_cache(maxsize=None)
+def _algorithm_matches(inputs, output, cls):
+    # Memoized, since the same annotations are matched against the whole registry
+    # every time a grammar with `algorithm(...)` parameters is generated
+    if not hasattr(cls, "run"):
+        return False
+
+    signature = inspect.signature(cls.run)
+    input_types = [v.annotation for k, v in signature.parameters.items() if k != "self"]
+    output_type = signature.return_annotation
+
+    if len(inputs) != len(input_types):
+        return False
+
+    for expected, real in zip(inputs, input_types):
+        if not issubclass(expected, real):
+            return False
+
+    if not issubclass(output_type, output):
+        return False
+
+    return True
+
+
 class Algorithm(abc.ABC):
     """Represents an abstract algorithm with a run method.
 
@@ -301,25 +314,94 @@ class Pipeline:
     ) -> None:
         self.algorithms = algorithms
         self.input_types = input_types
-
-    def run(self, *inputs):
+        self._mode = "train"
+        self._fitted = {}
+        self._train_keys = {}
+
+    def run(
+        self, *inputs, cache: StepCache = None, cache_key=None, profile: list = None
+    ):
+        """Runs all the algorithms in sequence.
+
+        If a `cache` (a `StepCache`) is given along with a `cache_key` that identifies the
+        inputs (e.g., the fold), the output of each step is cached under a key made of the
+        upstream key and the algorithm class and hyperparameters. Pipelines sharing a prefix
+        of steps with a previous one reuse its outputs instead of training those steps again.
+        Hyperparameters of sampled steps are identified by the sampler decisions that made
+        them, while steps built by hand are identified by their `repr`.
+
+        When training with a cache, the pipeline's own algorithms are never fitted. Instead,
+        a private copy of the fitted step stored in the cache is used when running in `"eval"`
+        mode, so the cached steps, shared by every pipeline that hits the same entry, never change.
+
+        If a `profile` list is given, a `StepProfile` with the time and memory used by
+        each step is appended to it.
+        """
         data = {}
 
         for i, t in zip(inputs, self.input_types):
             data[t] = i
 
-        for algorithm in self.algorithms:
+        mode = getattr(self, "_mode", "train")
+
+        if mode == "train":
+            self._fitted = {}
+            self._train_keys = {}
+
+        key = cache_key if cache is not None else None
+
+        for index, algorithm in enumerate(self.algorithms):
             args = build_input_args(algorithm, data)
-            output = algorithm.run(**args)
+            start = StepProfile.start() if profile is not None else None
+
+            if key is None:
+                output = self._step(index).run(**args)
+            elif mode == "train":
+                key = (key, _step_key(algorithm))
+                fitted, output = cache.get(key, (None, None))
+
+                if fitted is None:
+                    # The pipeline's own algorithm is left untouched, a copy is trained
+                    fitted = copy.deepcopy(algorithm)
+                    output = fitted.run(**args)
+                    cache.put(key, (fitted, output))
+
+                # Cached steps are shared (maybe among threads), and must never change,
+                # but `send` changes the mode of the pipeline's steps.
+                self._fitted[index] = copy.deepcopy(fitted)
+                self._train_keys[index] = key
+            else:
+                train_key = self._train_keys.get(index)
+                key = (key, train_key) if train_key is not None else None
+                output = cache.get(key) if key is not None else None
+
+                if output is None:
+                    output = self._step(index).run(**args)
+
+                    if key is not None:
+                        cache.put(key, output)
+
+            if profile is not None:
+                profile.append(StepProfile.measure(algorithm, mode, start, output))
+
             output_type = algorithm.output_type()
             data[output_type] = output
 
         return data[self.algorithms[-1].output_type()]
 
+    def _step(self, index):
+        return getattr(self, "_fitted", {}).get(index, self.algorithms[index])
+
     def send(self, msg: str, *args, **kwargs):
         found = False
 
-        for step in self.algorithms:
+        if msg in ("train", "eval"):
+            self._mode = msg
+
+        # Fitted steps obtained from a `StepCache` must receive messages as well
+        steps = list(self.algorithms) + list(getattr(self, "_fitted", {}).values())
+
+        for step in steps:
             if hasattr(step, msg):
                 getattr(step, msg)(*args, **kwargs)
                 found = True
@@ -382,6 +464,20 @@ class Pipeline:
         return answer
 
 
+class _SeqAlgorithmMeta(abc.ABCMeta):
+    # Classes made by `make_seq_algorithm` can't be pickled by name, so they are
+    # pickled as the call that makes them (see the `copyreg` registration below)
+    pass
+
+
+def _reduce_seq_algorithm(cls):
+    return make_seq_algorithm, (cls.__inner_algorithm__,)
+
+
+copyreg.pickle(_SeqAlgorithmMeta, _reduce_seq_algorithm)
+
+
+@functools.lru_cache(maxsize=None)
 def make_seq_algorithm(algorithm: Algorithm) -> Algorithm:
     """Lift an algorithm with input types T1, T2, Tn to a meta-algorithm with types Seq[T1], Seq[T2], ...
 
@@ -411,6 +507,11 @@ def make_seq_algorithm(algorithm: Algorithm) -> Algorithm:
     {'x': [1, 2], 'y': ['hello', 'world']}
     >>> b.get_inner_signature()
     <Signature (self, alpha)>
+
+    The same class is returned for the same `algorithm`, and it can be pickled:
+
+    >>> make_seq_algorithm(A) is B
+    True
     """
 
     output_type = algorithm.output_type()
@@ -457,8 +558,14 @@ def make_seq_algorithm(algorithm: Algorithm) -> Algorithm:
         ns["input_args"] = input_args_method
         ns["output_type"] = output_types_method
         ns["get_inner_signature"] = get_inner_signature_method
+        ns["__inner_algorithm__"] = algorithm
 
-    return types.new_class(name=name, bases=(Algorithm,), exec_body=body)
+    return types.new_class(
+        name=name,
+        bases=(Algorithm,),
+        kwds=dict(metaclass=_SeqAlgorithmMeta),
+        exec_body=body,
+    )
 
 
 Akw = namedtuple("Akw", ["args", "kwargs"])
@@ -497,15 +604,41 @@ def _make_list_args_and_kwargs(*args, **kwargs):
     return [Akw(xs, ks) for xs, ks in zip(inner_args, inner_kwargs)]
 
 
+def _step_key(algorithm):
+    # `repr` is not enough for sampled steps, since it skips e.g. `None` arguments
+    digest = getattr(algorithm, "sampled_config_", None)
+
+    if digest is None:
+        return repr(algorithm)
+
+    return (type(algorithm), digest)
+
+
 class PipelineNode:
     def __init__(self, algorithm, input_types, output_types, registry=None) -> None:
         self.algorithm = algorithm
         self.input_types = set(input_types)
         self.output_types = set(output_types)
-        self.grammar = generate_cfg(self.algorithm, registry=registry)
+        self.registry = registry
+        self._grammar = generate_cfg(self.algorithm, registry=registry)
+
+    @property
+    def grammar(self):
+        # Unpickled nodes regenerate their grammar the first time it is needed
+        if self._grammar is None:
+            self._grammar = generate_cfg(self.algorithm, registry=self.registry)
+
+        return self._grammar
+
+    def __getstate__(self):
+        return dict(self.__dict__, _grammar=None)
 
     def sample(self, sampler):
-        return self.grammar.sample(sampler=sampler)
+        # The decisions made for this step identify its configuration (see `Pipeline.run`)
+        recorder = ReplaySampler(sampler)
+        algorithm = self.grammar.sample(sampler=recorder)
+        algorithm.sampled_config_ = recorder.digest()
+        return algorithm
 
     @property
     def __name__(self):
@@ -520,7 +653,8 @@ class PipelineNode:
         return f"<PipelineNode(algorithm={self.algorithm.__name__},input_types={[i.__name__ for i in self.input_types]},output_types={[o.__name__ for o in self.output_types]})>"
 
     def __hash__(self) -> int:
-        return hash(repr(self))
+        # Consistent with `__eq__`, which doesn't depend on the order of `input_types`
+        return hash((self.algorithm, frozenset(self.input_types)))
 
 
 class PipelineSpace(GraphSpace):
@@ -567,31 +701,60 @@ def build_pipeline_graph(
 
     # We start by enlarging the registry with all Seq[...] algorithms
 
-    pool = set(registry)
+    pool = list(registry)
 
     for algorithm in registry:
         for _ in range(max_list_depth):
             algorithm = make_seq_algorithm(algorithm)
-            pool.add(algorithm)
+            pool.append(algorithm)
 
-    # For building the graph, we'll keep at each node the guaranteed output types
+    # Unlike a set, the order is deterministic, and so is the graph
+    pool = list(dict.fromkeys(pool))
 
-    # We start by collecting all the possible input nodes,
-    # those that can process a subset of the input_types
-    open_nodes: List[PipelineNode] = []
+    # Signatures are read only once, and algorithms are indexed by each input type,
+    # such that only the algorithms that can take a given type are ever considered
+
+    inputs = {algorithm: algorithm.input_types() for algorithm in pool}
+    outputs = {algorithm: algorithm.output_type() for algorithm in pool}
+    consumers: Dict[type, List[Algorithm]] = {}
 
     for algorithm in pool:
-        if not algorithm.is_compatible_with(input_types):
-            continue
+        for input_type in set(inputs[algorithm]):
+            consumers.setdefault(input_type, []).append(algorithm)
+
+    # All the subtype relations between the types involved are computed upfront
+    lattice = TypeLattice([*input_types, output_type, *consumers, *outputs.values()])
+
+    def accepted_types(types):
+        # The input types that some of the given `types` can fill in
+        return set().union(*(lattice.supertypes(having) for having in types))
+
+    # Nodes are identified by algorithm and input types, and built only once
+    nodes: Dict[Tuple, PipelineNode] = {}
+
+    def make_node(algorithm, input_types):
+        key = (algorithm, frozenset(input_types))
 
-        open_nodes.append(
-            PipelineNode(
+        if key not in nodes:
+            nodes[key] = PipelineNode(
                 algorithm=algorithm,
                 input_types=input_types,
-                output_types=set(input_types) | set([algorithm.output_type()]),
+                output_types=set(input_types) | set([outputs[algorithm]]),
                 registry=registry,
             )
-        )
+
+        return nodes[key]
+
+    # For building the graph, we'll keep at each node the guaranteed output types
+
+    # We start by collecting all the possible input nodes,
+    # those that can process a subset of the input_types
+    accepted = accepted_types(input_types)
+    open_nodes = collections.deque()
+
+    for algorithm in pool:
+        if all(needed in accepted for needed in inputs[algorithm]):
+            open_nodes.append(make_node(algorithm, input_types))
 
     G = Graph()
 
@@ -600,20 +763,30 @@ def build_pipeline_graph(
 
     # We'll make a BFS exploration of the pipeline space.
     # For every open node we will add to the graph every node to which it can connect.
-    closed_nodes = set()
+    # Nodes ever queued are kept in a set for fast membership tests.
+    queued = set(open_nodes)
 
     while open_nodes:
-        node = open_nodes.pop(0)
+        node = open_nodes.popleft()
 
         # These are the types that are available at this node
         guaranteed_types = node.output_types
+        accepted = accepted_types(guaranteed_types)
 
         # The node's output type
-        node_output_type = node.algorithm.output_type()
+        node_output_type = outputs[node.algorithm]
+
+        # Here are all the algorithms that could be added new at this point in the graph.
+        # We do not want to ignore the last node's output type, so only those
+        # that take it as one of their inputs are candidates
+        candidates = {}
 
-        # Here are all the algorithms that could be added new at this point in the graph
-        for algorithm in pool:
-            if not algorithm.is_compatible_with(guaranteed_types):
+        for input_type, algorithms in consumers.items():
+            if lattice.is_subtype(node_output_type, input_type):
+                candidates.update(dict.fromkeys(algorithms))
+
+        for algorithm in candidates:
+            if not all(needed in accepted for needed in inputs[algorithm]):
                 continue
 
             # We never want to apply the same exact algorithm twice
@@ -622,10 +795,10 @@ def build_pipeline_graph(
 
             # And we never want an algorithm that doesn't provide a novel output type...
             if (
-                algorithm.output_type() in guaranteed_types
+                outputs[algorithm] in guaranteed_types
                 and
                 # ... unless it is an idempotent algorithm
-                tuple([algorithm.output_type()]) != algorithm.input_types()
+                tuple([outputs[algorithm]]) != inputs[algorithm]
             ):
                 continue
 
@@ -633,33 +806,17 @@ def build_pipeline_graph(
             #      The downside is that it prevents pipelines that need two algorithms
             #      to generate the input of another one.
 
-            # And we do not want to ignore the last node's output type
-            is_using_last_output = False
-            for input_type in algorithm.input_types():
-                if issubclass(node_output_type, input_type):
-                    is_using_last_output = True
-                    break
-            if not is_using_last_output:
-                continue
-
-            p = PipelineNode(
-                algorithm=algorithm,
-                input_types=guaranteed_types,
-                output_types=guaranteed_types | set([algorithm.output_type()]),
-                registry=registry,
-            )
-
+            p = make_node(algorithm, guaranteed_types)
             G.add_edge(node, p)
 
-            if p not in closed_nodes and p not in open_nodes:
+            if p not in queued:
+                queued.add(p)
                 open_nodes.append(p)
 
         # Now we check to see if this node is a possible output
-        if issubclass(node.algorithm.output_type(), output_type):
+        if lattice.is_subtype(node_output_type, output_type):
             G.add_edge(node, GraphSpace.End)
 
-        closed_nodes.add(node)
-
     # Remove all nodes that are not connected to the end node
     try:
         reachable_from_end = set(
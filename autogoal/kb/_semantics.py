@@ -13,9 +13,11 @@
 
 # We will never really instantiate these classes, just use them for annotations.
 
-from functools import reduce
+from functools import reduce, lru_cache
 import inspect
 import copyreg
+import random
+import sys
 from typing import Type
 import json
 
@@ -27,6 +29,21 @@ import json
 # and to leave space for implementing class-level `__getitem__` to allow for a generics kind-of notation.
 
 
+# Subclass checks between semantic types can be expensive (e.g., comparing `Tensor` flags
+# or nested `Seq` internal types), and they are repeated a lot while building pipelines.
+# Since specialized types are singletons and the hierarchy never changes once a class is defined,
+# recent results are memoized by the identity of both classes. The memo is bounded, since it
+# keeps alive every class it holds (e.g., dynamically specialized `Seq` and `Tensor` types).
+
+
+@lru_cache(maxsize=2 ** 14)
+def _subclass_check(cls, subclass) -> bool:
+    if hasattr(subclass, "_conforms") and subclass._conforms(cls):
+        return True
+
+    return type.__subclasscheck__(cls, subclass)
+
+
 class SemanticTypeMeta(type):
     def __instancecheck__(cls, instance) -> bool:
         return cls._match(instance)
@@ -38,10 +55,13 @@ class SemanticTypeMeta(type):
             return cls._specialize(args)
 
     def __subclasscheck__(cls, subclass: type) -> bool:
-        if hasattr(subclass, "_conforms") and subclass._conforms(cls):
-            return True
+        try:
+            hash(subclass)
+        except TypeError:
+            # Not hashable, hence not a class, let `type` raise the proper error
+            return super().__subclasscheck__(subclass)
 
-        return super().__subclasscheck__(subclass)
+        return _subclass_check(cls, subclass)
 
     def __call__(self, *args, **kwds):
         raise TypeError("Cannot instantiate a semantic type")
@@ -93,11 +113,40 @@ class SemanticType(metaclass=SemanticTypeMeta):
         >>> SemanticType.infer(np.ones(shape=(2,2)))
         Tensor[2, Continuous, Dense]
 
+        Sequences are inferred from the most specific type of their items.
+        Long sequences are inferred from a bounded sample of items.
+
+        >>> SemanticType.infer(["hello", "world"])
+        Seq[Word]
+        >>> SemanticType.infer(["hello", "hello world"] * 1000)
+        Seq[Sentence]
+
+        `pandas` data frames are inferred from the `dtype` of each column,
+        without converting them to a single array:
+
+        >>> import pandas as pd
+        >>> SemanticType.infer(pd.DataFrame({"a": [1.0, 2.0], "b": [0.5, 1.5]}))
+        Tensor[2, Continuous, Dense]
+        >>> SemanticType.infer(pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]}))
+        Tensor[2, Continuous, Dense]
+        >>> SemanticType.infer(pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]}))
+        Tensor[2, Categorical, Dense]
+
         """
-        types = inspect.getmembers(inspect.getmodule(SemanticType), inspect.isclass)
+        pandas = sys.modules.get("pandas")
+
+        if pandas is not None and isinstance(x, pandas.DataFrame):
+            return _infer_dataframe(x)
+
+        if pandas is not None and isinstance(x, pandas.Series):
+            return _infer_column(x.to_numpy())
+
+        if isinstance(x, (list, tuple)):
+            return _infer_sequence(x)
+
         best_type = SemanticType
 
-        for _, t in types:
+        for t in _inference_candidates():
             if isinstance(x, t) and issubclass(t, best_type):
                 best_type = t
 
@@ -106,6 +155,18 @@ class SemanticType(metaclass=SemanticTypeMeta):
 
         return best_type
 
+    @staticmethod
+    def infer_columns(x):
+        """Determines the semantic type of each column in a `pandas` data frame.
+
+        >>> import pandas as pd
+        >>> df = pd.DataFrame({"age": [20, 30], "score": [0.5, 0.7], "name": ["John", "Jane"]})
+        >>> SemanticType.infer_columns(df)
+        {'age': Tensor[1, Discrete, Dense], 'score': Tensor[1, Continuous, None], 'name': Seq[Word]}
+
+        """
+        return {column: _infer_column(x[column].to_numpy()) for column in x.columns}
+
     @classmethod
     def from_json(x, data):
         return json.loads(data)
@@ -115,6 +176,105 @@ class SemanticType(metaclass=SemanticTypeMeta):
         return json.dumps(data)
 
 
+# Type inference relies on a few helpers.
+# The candidate types are all the semantic types defined in this module, collected only once.
+# Sequences are inferred (and matched) from a bounded sample of their items, always including the first one.
+# The sample is random but deterministic, such that the same sequence always gets the same type.
+
+_SAMPLE_SIZE = 100
+
+
+@lru_cache(maxsize=None)
+def _inference_candidates():
+    return tuple(
+        t
+        for _, t in inspect.getmembers(inspect.getmodule(SemanticType), inspect.isclass)
+        if isinstance(t, SemanticTypeMeta)
+    )
+
+
+def _sample(x):
+    if len(x) <= _SAMPLE_SIZE:
+        return x
+
+    rng = random.Random(len(x))
+    indices = rng.sample(range(1, len(x)), _SAMPLE_SIZE - 1)
+
+    return [x[0]] + [x[i] for i in indices]
+
+
+def _join(types):
+    # The most specific type that all the `types` are subclasses of
+    types = iter(types)
+    best_type = next(types)
+
+    for t in types:
+        if issubclass(t, best_type):
+            continue
+
+        # Sequences join by their internal types, e.g., `Seq[Word]` and `Seq[Text]`
+        if hasattr(t, "__internal_type__") and hasattr(best_type, "__internal_type__"):
+            best_type = Seq[_join([best_type.__internal_type__, t.__internal_type__])]
+            continue
+
+        for parent in best_type.__mro__:
+            if issubclass(t, parent):
+                best_type = parent
+                break
+
+    return best_type
+
+
+def _infer_sequence(x):
+    sample = _sample(x)
+
+    if len(sample) == 0:
+        raise ValueError("Cannot infer semantic type for an empty sequence")
+
+    try:
+        internal_type = _join(SemanticType.infer(item) for item in sample)
+    except ValueError:
+        raise ValueError(f"Cannot infer semantic type for {x}")
+
+    if internal_type in (SemanticType, Seq):
+        raise ValueError(f"Cannot infer semantic type for {x}")
+
+    return Seq[internal_type]
+
+
+def _infer_column(values):
+    # Numeric columns are vectors, anything else is a sequence of semantic values
+    if values.dtype.kind == "O":
+        return _infer_sequence(values)
+
+    return SemanticType.infer(values)
+
+
+def _infer_dataframe(x):
+    internal_types = {_infer_column_data(dtype) for dtype in x.dtypes}
+
+    # Integer and float columns together are just numbers
+    if internal_types == {Discrete, Continuous}:
+        return Tensor[2, Continuous, Dense]
+
+    # Any other mix only makes sense as categories, i.e., for encoders to consume
+    if len(internal_types) > 1:
+        return Tensor[2, Categorical, Dense]
+
+    return Tensor[2, internal_types.pop(), Dense]
+
+
+def _infer_column_data(dtype):
+    if dtype.kind in "iu":
+        return Discrete
+
+    if dtype.kind == "f":
+        return Continuous
+
+    # Most real categorical data are `object` (or `category`, `bool`, `string`) columns
+    return Categorical
+
+
 # To be able to serialize these types, we have to register a reduce function for `SemanticTypeMeta`.
 # This reduce function will just dispatch to the proper instance method
 
@@ -260,7 +420,11 @@ class Seq(SemanticType):
 
             @classmethod
             def _match(cls, x):
-                return isinstance(x, (list, tuple)) and internal_type._match(x[0])
+                return (
+                    isinstance(x, (list, tuple))
+                    and len(x) > 0
+                    and all(internal_type._match(item) for item in _sample(x))
+                )
 
             @classmethod
             def _conforms(cls, other):
@@ -512,11 +676,65 @@ MatrixDiscrete = Tensor[2, Discrete, Dense]
 Tensor3 = Tensor[3, Continuous, Dense]
 Tensor4 = Tensor[4, Continuous, Dense]
 
+# To query the subtype relation among a known set of types without calling `issubclass` at all,
+# the whole relation can be precomputed into a lattice.
+
+
+class TypeLattice:
+    """Precomputed subtype relation among a fixed collection of types.
+
+    >>> lattice = TypeLattice([Word, Sentence, Text, Seq[Word], Seq[Text], MatrixContinuousDense, Matrix])
+    >>> lattice.is_subtype(Word, Text)
+    True
+    >>> lattice.is_subtype(Seq[Text], Seq[Word])
+    False
+    >>> sorted(lattice.supertypes(Seq[Word]), key=repr)
+    [Seq[Text], Seq[Word]]
+    >>> sorted(lattice.subtypes(Matrix), key=repr)
+    [Tensor[2, Continuous, Dense], Tensor[2, None, None]]
+
+    Types outside the lattice fall back to `issubclass`:
+
+    >>> lattice.is_subtype(Word, Document)
+    True
+
+    """
+
+    def __init__(self, types) -> None:
+        self.types = list(dict.fromkeys(types))
+        self._supertypes = {t: set() for t in self.types}
+        self._subtypes = {t: set() for t in self.types}
+
+        for t in self.types:
+            for other in self.types:
+                if issubclass(t, other):
+                    self._supertypes[t].add(other)
+                    self._subtypes[other].add(t)
+
+    def __contains__(self, t) -> bool:
+        return t in self._supertypes
+
+    def is_subtype(self, t, other) -> bool:
+        if t in self._supertypes and other in self._supertypes:
+            return other in self._supertypes[t]
+
+        return issubclass(t, other)
+
+    def supertypes(self, t) -> set:
+        """Returns all the types in the lattice that `t` is a subtype of, including itself."""
+        return self._supertypes[t]
+
+    def subtypes(self, t) -> set:
+        """Returns all the types in the lattice that are subtypes of `t`, including itself."""
+        return self._subtypes[t]
+
+
 # Finally we define the publicly export classes
 
 __all__ = [
     "SemanticType",
     "Seq",
+    "TypeLattice",
     "Text",
     "Document",
     "Sentence",
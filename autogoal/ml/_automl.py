@@ -4,6 +4,18 @@ import pickle
 import statistics
 import os
 import shutil
+import sys
+
+try:
+    from importlib.metadata import PackageNotFoundError, version as package_version
+except ImportError:
+    # Python < 3.8
+    from pkg_resources import DistributionNotFound as PackageNotFoundError
+    from pkg_resources import get_distribution
+
+    def package_version(package):
+        return get_distribution(package).version
+
 
 import numpy as np
 from autogoal.contrib import find_classes
@@ -11,8 +23,16 @@ from pathlib import Path
 
 from autogoal.kb import build_pipeline_graph, SemanticType, Pipeline
 from autogoal.ml.metrics import accuracy
+from autogoal.ml._metalearning import DatasetFeatureExtractor, LearnerMedia
 from autogoal.search import PESearch
-from autogoal.utils import nice_repr, generate_production_dockerfile
+from autogoal.utils import (
+    nice_repr,
+    generate_production_dockerfile,
+    SharedData,
+    FitnessCache,
+    StepCache,
+    dataset_fingerprint,
+)
 
 
 @nice_repr
@@ -22,6 +42,28 @@ class AutoML:
 
     An `AutoML` instance represents a general-purpose machine learning
     algorithm, that can be applied to any input and output.
+
+    With `objectives=("latency", "memory")` (or any subset), pipelines are also
+    evaluated by their prediction time per sample and by how much the resident memory
+    grows during their evaluation (see `MemoryMonitor`). The search then keeps the Pareto front of pipelines,
+    available after `fit` as `pareto_front_`: a list of `(pipeline, (score, latency, memory))` tuples.
+
+    With `step_cache` set to a number of bytes, the outputs of pipeline steps are cached
+    (see `StepCache`) and reused by candidates that share a prefix of steps. Since the cache
+    lives in the evaluating process, it requires evaluating in-process
+    (`evaluation_timeout=0, memory_limit=0`) or with `persistent_workers=True`.
+
+    With `warm_start` set to the path of a log written by `DatasetFeatureLogger`, the
+    initial probabilistic model of a `PESearch` is built from the solutions evaluated in
+    previous runs, weighted by the similarity of their datasets with the current one
+    (see `LearnerMedia`).
+
+    With `profile=True`, the time and memory used by each step of every evaluated pipeline
+    is reported to the loggers (see `ProfileLogger`).
+
+    With `pipeline_cache` set to a folder, the pipeline space built for the given
+    input and output types, registry and `max_list_depth` is saved there, and loaded
+    instead of built again in later runs (see `make_pipeline_builder`).
     """
 
     def __init__(
@@ -39,6 +81,14 @@ class AutoML:
         cross_validation_steps=3,
         registry=None,
         score_metric=None,
+        shared_memory=False,
+        fitness_cache=None,
+        objectives=(),
+        step_cache=None,
+        warm_start=None,
+        profile=False,
+        pipeline_cache=None,
+        max_list_depth=3,
         **search_kwargs,
     ):
         self.input = input
@@ -54,6 +104,14 @@ class AutoML:
         self.registry = registry
         self.random_state = random_state
         self.score_metric = score_metric or accuracy
+        self.shared_memory = shared_memory
+        self.fitness_cache = fitness_cache
+        self.objectives = tuple(objectives)
+        self.step_cache = step_cache
+        self.warm_start = warm_start
+        self.profile = profile
+        self.pipeline_cache = pipeline_cache
+        self.max_list_depth = max_list_depth
         self.search_kwargs = search_kwargs
         self._unpickled = False
 
@@ -71,27 +129,107 @@ class AutoML:
             include=self.include_filter, exclude=self.exclude_filter
         )
 
-        return build_pipeline_graph(
-            input_types=self.input, output_type=self.output, registry=registry,
+        if self.pipeline_cache is None:
+            return build_pipeline_graph(
+                input_types=self.input,
+                output_type=self.output,
+                registry=registry,
+                max_list_depth=self.max_list_depth,
+            )
+
+        path = Path(self.pipeline_cache) / (
+            "%s.pickle" % self._pipeline_fingerprint(registry)
         )
 
-    def fit(self, X, y=None, **kwargs):
+        if path.exists():
+            with path.open("rb") as fp:
+                return pickle.load(fp)
+
+        builder = build_pipeline_graph(
+            input_types=self.input,
+            output_type=self.output,
+            registry=registry,
+            max_list_depth=self.max_list_depth,
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+
+        with tmp.open("wb") as fp:
+            pickle.dump(builder, fp)
+
+        os.replace(tmp, path)
+        return builder
+
+    def _pipeline_fingerprint(self, registry):
+        """
+        Identifies a pipeline space by the input and output types, the algorithms in the
+        registry, the versions of the packages they come from, and the `max_list_depth`.
+        """
+        algorithms = []
+
+        for cls in registry:
+            package = cls.__module__.split(".")[0]
+            algorithms.append((cls.__module__, cls.__qualname__, _version(package)))
+
+        return dataset_fingerprint(
+            repr(self.input),
+            repr(self.output),
+            sorted(algorithms),
+            self.max_list_depth,
+            _version("autogoal"),
+            sys.version_info[:2],
+        )
+
+    def fit(self, X, y=None, resume_from=None, **kwargs):
         self.input = self._input_type(X)
 
         if not y is None:
             self.output = self._output_type(y)
 
+        search_kwargs = dict(self.search_kwargs)
+        cost_model = search_kwargs.get("cost_model")
+
+        if cost_model is not None and cost_model.data_size is None:
+            cost_model.data_size = len(X) if isinstance(X, list) else X.shape[0]
+
+        if self.fitness_cache is not None:
+            search_kwargs.setdefault("fitness_cache", self.make_fitness_cache(X, y))
+
+        if self.objectives:
+            # Maximize the score, minimize everything else (e.g., latency or memory)
+            search_kwargs.setdefault(
+                "maximize", (True,) + (False,) * len(self.objectives)
+            )
+
+        if self.warm_start is not None and issubclass(self.search_algorithm, PESearch):
+            search_kwargs.setdefault("initial_model", self.make_initial_model(X, y))
+
         search = self.search_algorithm(
             self.make_pipeline_builder(),
             self.make_fitness_fn(X, y),
             random_state=self.random_state,
             errors=self.errors,
-            **self.search_kwargs,
+            **search_kwargs,
         )
 
-        self.best_pipeline_, self.best_score_ = search.run(
-            self.search_iterations, **kwargs
-        )
+        try:
+            best, best_fn = search.run(
+                self.search_iterations, resume_from=resume_from, **kwargs
+            )
+        finally:
+            self._release_shared_data()
+
+        if self.objectives:
+            # The search returns the Pareto front, the most accurate is used by default
+            self.pareto_front_ = list(zip(best or [], best_fn or []))
+
+            if not self.pareto_front_:
+                raise ValueError("No pipeline could be evaluated successfully.")
+
+            best, best_fn = max(self.pareto_front_, key=lambda item: item[1][0])
+
+        self.best_pipeline_, self.best_score_ = best, best_fn
 
         self.fit_pipeline(X, y)
 
@@ -177,18 +315,81 @@ class AutoML:
         if not y is None:
             y = np.asarray(y)
 
-        def fitness_fn(pipeline):
+        if self.shared_memory:
+            # The dataset is placed once in shared memory, and evaluation
+            # workers attach read-only views instead of receiving copies.
+            X, y = self._share_data(X), self._share_data(y)
+
+        step_cache = StepCache(self.step_cache) if self.step_cache else None
+
+        def fitness_fn(pipeline, budget=1.0, best_fitness=None):
+            # Only multi-fidelity searches (`min_budget`) evaluate on a fraction of the data
+            kwargs = dict(budget=budget) if budget < 1 else {}
+
+            # Only racing searches (`racing=True`) report the best fitness so far
+            if best_fitness is not None:
+                kwargs["best_fitness"] = best_fitness
+
+            if self.objectives:
+                kwargs["objectives"] = self.objectives
+
+            if step_cache is not None:
+                kwargs["step_cache"] = step_cache
+
+            if self.profile:
+                kwargs["profile"] = True
+
             return self.score_metric(
                 pipeline,
-                X,
-                y,
-                self.validation_split,
-                self.cross_validation_steps,
-                self.cross_validation,
+                _unshare_data(X),
+                _unshare_data(y),
+                validation_split=self.validation_split,
+                cross_validation_steps=self.cross_validation_steps,
+                cross_validation=self.cross_validation,
+                **kwargs,
             )
 
         return fitness_fn
 
+    def make_fitness_cache(self, X, y=None):
+        """
+        Builds a `FitnessCache` stored at `self.fitness_cache`.
+
+        Cached fitness values are only valid for the same data and evaluation protocol,
+        hence both are part of the cache namespace.
+        """
+        protocol = (
+            getattr(self.score_metric, "__name__", repr(self.score_metric)),
+            self.validation_split,
+            self.cross_validation_steps,
+            self.cross_validation,
+            # Both change the fitness values, i.e., their type or the folds they are computed on
+            self.objectives,
+            bool(self.step_cache),
+        )
+
+        return FitnessCache(
+            self.fitness_cache,
+            namespace="%s:%s"
+            % (dataset_fingerprint(X, y), dataset_fingerprint(protocol)),
+        )
+
+    def make_initial_model(self, X, y=None):
+        """
+        Builds a `PESearch` model from the metalearning log at `self.warm_start`.
+        """
+        problem = DatasetFeatureExtractor().extract_features(X, y)
+        return LearnerMedia.from_file(problem, self.warm_start).build_model()
+
+    def _share_data(self, value):
+        shared = SharedData(value)
+        self.__dict__.setdefault("_shared_data", []).append(shared)
+        return shared
+
+    def _release_shared_data(self):
+        for shared in self.__dict__.pop("_shared_data", []):
+            shared.close()
+
     def predict(self, X):
         self._check_fitted()
 
@@ -230,3 +431,20 @@ build:
         makefile.close()
 
         print("generated assets for production deployment")
+
+
+def _version(package):
+    module = sys.modules.get(package)
+    version = getattr(module, "__version__", None)
+
+    if version is not None:
+        return version
+
+    try:
+        return package_version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def _unshare_data(value):
+    return value.value if isinstance(value, SharedData) else value
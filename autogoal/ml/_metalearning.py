@@ -4,6 +4,7 @@ import functools
 import warnings
 import json
 import collections
+import numbers
 import numpy as np
 
 from typing import List
@@ -11,8 +12,6 @@ from autogoal.search import Logger
 from autogoal.utils import nice_repr
 from autogoal import sampling
 
-# from sklearn.feature_extraction import DictVectorizer
-
 
 class DatasetFeatureLogger(Logger):
     def __init__(
@@ -39,9 +38,10 @@ class DatasetFeatureLogger(Logger):
         if not hasattr(solution, "sampler_"):
             raise ("Cannot log if the underlying algorithm is not PESearch")
 
-        sampler = solution.sampler_
+        # The `ModelSampler` is wrapped by the `ReplaySampler` that generated the solution
+        sampler = getattr(solution.sampler_, "sampler", solution.sampler_)
 
-        features = {k: v for k, v in sampler._updates.items() if isinstance(k, str)}
+        features = {k: v for k, v in sampler.updates.items() if isinstance(k, str)}
         feature_types = {k: repr(v) for k, v in sampler._model.items() if k in features}
 
         info = SolutionInfo(
@@ -162,13 +162,35 @@ class SolutionInfo:
 
 
 class LearnerMedia:
-    def __init__(self, problem, solutions: List[SolutionInfo], beta=1):
+    """
+    Builds an initial probabilistic model for a new problem from the solutions
+    evaluated in previous problems (as logged by `DatasetFeatureLogger`).
+
+    Each past solution is weighted by its fitness (normalized by the best fitness of its run)
+    times the similarity of its problem with the new one raised to `beta`. Only the runs of
+    the `k` most similar problems are considered, if given. The parameters of each sampling
+    handle are then computed with the `weighted()` method of the corresponding `ModelParam`.
+    """
+
+    def __init__(self, problem, solutions: List[SolutionInfo], beta=1, k=None):
         self.solutions = solutions
         self.problem = problem
         self.beta = beta
+        self.k = k
+
+    @staticmethod
+    def from_file(problem, path="metalearning.json", **kwargs) -> "LearnerMedia":
+        """
+        Creates a `LearnerMedia` from the solutions logged in `path`.
+        """
+        with open(path) as fp:
+            solutions = [SolutionInfo.from_dict(json.loads(line)) for line in fp if line.strip()]
+
+        return LearnerMedia(problem, solutions, **kwargs)
 
     def initialize(self):
-        raise NotImplementedError("We need to refactor to not depend on DictVectorizer")
+        # Errors are logged as infinite fitness, they say nothing about good regions
+        self.solutions = [s for s in self.solutions if np.isfinite(s.fitness)]
 
         self.best_fitness = collections.defaultdict(lambda: 0)
         self.all_features = {}
@@ -179,8 +201,18 @@ class LearnerMedia:
             for feature in i.pipeline_features:
                 self.all_features[feature] = None
 
-        self.vect = DictVectorizer(sparse=False)
-        self.vect.fit([self.problem])
+        self.problem_keys = sorted(
+            k for k, v in self.problem.items() if _numeric(v) is not None
+        )
+
+        if self.k is not None:
+            similarity = {}
+
+            for info in self.solutions:
+                similarity[info.uuid] = self.similarity_cosine(info.problem_features)
+
+            closest = set(sorted(similarity, key=similarity.get, reverse=True)[: self.k])
+            self.solutions = [s for s in self.solutions if s.uuid in closest]
 
         self.weights_solution = self.calculate_weight_examples(self.solutions)
 
@@ -189,7 +221,14 @@ class LearnerMedia:
 
         for feature in list(self.all_features):
             self.all_features[feature] = self.compute_feature(feature)
-            print(feature, "=", self.all_features[feature])
+
+        return self.all_features
+
+    def build_model(self) -> dict:
+        """
+        Returns an initial model for `ModelSampler` (e.g., `PESearch(initial_model=...)`).
+        """
+        return {k: v for k, v in self.compute_all_features().items() if v is not None}
 
     def compute_feature(self, feature):
         """Select for training all solutions where is used the especific feature.
@@ -226,33 +265,48 @@ class LearnerMedia:
 
         for info in solutions:
             # normalize fitness
-            info.fitness = self.normalize_fitness(info)
+            fitness = self.normalize_fitness(info)
 
-            if info.fitness == 0:
+            if fitness == 0:
+                weights.append(0)
                 continue
 
             # calculate similarity
             sim = self.similarity_cosine(info.problem_features)
             # calculate metric for weight
-            weights.append(info.fitness * (sim) ** self.beta)
+            weights.append(fitness * max(sim, 0) ** self.beta)
 
         return weights
 
     def normalize_fitness(self, info: SolutionInfo):
         """Normalize the fitness with respect to the best solution in the problem where that solution is evaluated
         """
-        return info.fitness / self.best_fitness[info.uuid]
+        return info.fitness / (self.best_fitness[info.uuid] or 1)
 
     def similarity_cosine(self, other_problem):
         """Caculate the cosine similarity for a particular solution problem(other problem) 
         and the problem analizing
         """
-        x = self.vect.transform(other_problem)[0]
-        y = self.vect.transform(self.problem)[0]
+        x = self._vectorize(other_problem)
+        y = self._vectorize(self.problem)
+        norm = np.dot(x, x) ** 0.5 * np.dot(y, y) ** 0.5
 
-        return np.dot(x, y) / (np.dot(x, x) ** 0.5 * np.dot(y, y) ** 0.5)
+        return np.dot(x, y) / norm if norm else 0.0
+
+    def _vectorize(self, problem):
+        # Features have very different scales (e.g., number of examples vs. booleans),
+        # so magnitudes are compressed logarithmically
+        x = np.asarray([_numeric(problem.get(k)) or 0.0 for k in self.problem_keys])
+        return np.sign(x) * np.log1p(np.abs(x))
 
     def similarity_learning(self, other_problem):
         """ Implementar una espicie de encoding para los feature de los problemas
         """
         raise NotImplementedError()
+
+
+def _numeric(value):
+    if isinstance(value, numbers.Real) and np.isfinite(value):
+        return float(value)
+
+    return None
@@ -1,8 +1,13 @@
 import inspect
+import math
+from collections.abc import Sequence
 from textwrap import wrap
 import numpy as np
 import statistics
+import time
+from autogoal.exceptions import PrunedEvaluation
 from autogoal.ml.utils import LabelEncoder, check_number_of_labels
+from autogoal.utils import EvaluationResult, MemoryMonitor
 from functools import wraps
 
 METRICS = []
@@ -39,18 +44,42 @@ def supervised_fitness_fn(score_metric_fn):
         validation_split=0.3,
         cross_validation_steps=3,
         cross_validation="median",
+        budget=1.0,
+        best_fitness=None,
+        score_upper_bound=1.0,
+        objectives=(),
+        step_cache=None,
+        profile=False,
         **kwargs
     ):
+        aggregate = getattr(statistics, cross_validation)
+        # The process may have evaluated other pipelines before, only growth is due to this one
+        memory = MemoryMonitor().start() if "memory" in objectives else None
         scores = []
-        for _ in range(cross_validation_steps):
-            len_x = len(X) if isinstance(X, list) else X.shape[0]
-            indices = np.arange(0, len_x)
-            np.random.shuffle(indices)
-            split_index = int(validation_split * len(indices))
+        latencies = []
+        steps = []
+        for step in range(cross_validation_steps):
+            len_x = len(X) if isinstance(X, Sequence) else X.shape[0]
+
+            # Cached steps can only be reused if every candidate sees the same folds
+            rng = np.random.RandomState(step) if step_cache is not None else np.random
+
+            if budget < 1:
+                # Low-fidelity evaluation on a stratified subsample of the data, large
+                # enough for both the train and the test split to be non-empty
+                size = max(2, math.ceil(1 / validation_split), int(budget * len_x))
+                indices = stratified_subsample(y, size, rng)
+            else:
+                indices = np.arange(0, len_x)
+
+            rng.shuffle(indices)
+            split_index = min(
+                len(indices) - 1, max(1, int(validation_split * len(indices)))
+            )
             train_indices = indices[:-split_index]
             test_indices = indices[-split_index:]
 
-            if isinstance(X, list):
+            if isinstance(X, Sequence):
                 X_train, y_train, X_test, y_test = (
                     [X[i] for i in train_indices],
                     y[train_indices],
@@ -65,16 +94,87 @@ def supervised_fitness_fn(score_metric_fn):
                     y[test_indices],
                 )
 
+            train_cache, test_cache = {}, {}
+
+            if step_cache is not None:
+                train_cache = dict(cache=step_cache, cache_key=(step, budget, "train"))
+                test_cache = dict(cache=step_cache, cache_key=(step, budget, "test"))
+
+            if profile:
+                train_cache["profile"] = test_cache["profile"] = steps
+
             pipeline.send("train")
-            pipeline.run(X_train, y_train)
+            pipeline.run(X_train, y_train, **train_cache)
             pipeline.send("eval")
-            y_pred = pipeline.run(X_test, None)
+            start = time.perf_counter()
+            y_pred = pipeline.run(X_test, None, **test_cache)
+            latencies.append((time.perf_counter() - start) / max(1, len(test_indices)))
             scores.append(score_metric_fn(y_test, y_pred))
-        return getattr(statistics, cross_validation)(scores)
+
+            if best_fitness is not None and step < cross_validation_steps - 1:
+                # Racing: assume the remaining folds get the best possible score
+                remaining = cross_validation_steps - len(scores)
+                bound = aggregate(scores + [score_upper_bound] * remaining)
+
+                if bound < best_fitness:
+                    raise PrunedEvaluation(aggregate(scores))
+
+        if not objectives:
+            result = aggregate(scores)
+        else:
+            # Multi-objective evaluation, extra objectives are meant to be minimized
+            measures = dict(latency=aggregate(latencies))
+
+            if memory is not None:
+                measures["memory"] = memory.stop()
+
+            result = (aggregate(scores),) + tuple(measures[name] for name in objectives)
+
+        return EvaluationResult(result, steps) if profile else result
 
     return fitness_fn
 
 
+def stratified_subsample(y, size: int, random_state=None) -> np.ndarray:
+    """
+    Returns `size` random indices of `y` that (approximately) preserve the proportion of each label.
+
+    Every label keeps at least one index, so the result can be slightly larger than `size`.
+
+    ##### Examples
+
+    ```python
+    >>> y = np.array([0] * 80 + [1] * 20)
+    >>> indices = stratified_subsample(y, 10)
+    >>> len(indices)
+    10
+    >>> int((y[indices] == 1).sum())
+    2
+
+    ```
+    """
+    rng = random_state or np.random
+    y = np.asarray(y)
+
+    if size >= len(y):
+        return np.arange(len(y))
+
+    labels, inverse = np.unique(y, return_inverse=True)
+
+    if len(labels) > size or len(labels) > len(y) // 2:
+        # Not a classification target (e.g., regression), fall back to a random subsample
+        return rng.permutation(len(y))[:size]
+
+    indices = []
+
+    for label in range(len(labels)):
+        members = np.flatnonzero(inverse == label)
+        count = max(1, int(round(size * len(members) / len(y))))
+        indices.append(rng.permutation(members)[:count])
+
+    return np.concatenate(indices)
+
+
 def unsupervised_fitness_fn(score_metric_fn):
     @wraps(score_metric_fn)
     def fitness_fn(pipeline, X, *args, **kwargs):
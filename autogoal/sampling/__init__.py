@@ -1,7 +1,11 @@
+import array
+import hashlib
 import math
 import random
 import statistics
 import pickle
+import struct
+import sys
 import numpy as np
 
 from typing import Dict, List, Sequence
@@ -207,6 +211,198 @@ class ModelSampler(Sampler):
         return options[self._register_update(handle, idx)]
 
 
+class BatchModelSampler:
+    """
+    Samples `k` candidates at once from the same probabilistic model.
+
+    Instead of drawing every value one at a time, the `k` samplers returned by `samplers()`
+    share a pool of numpy arrays, one per handle (and per occurrence of that handle
+    in a candidate), that is drawn for all the candidates with a single vectorized call
+    the first time any of them needs it. Values sampled without a `handle` (except for
+    `choice`) are drawn one at a time from the batch `rand`, as `Sampler` does.
+
+    The values consumed by each candidate are recorded as positions in those arrays,
+    and `updates` (or `merge_updates()` for several candidates) are built from them on demand.
+    Each sampler is a regular `ModelSampler`, so it can be wrapped in a `ReplaySampler`.
+
+    ##### Examples
+
+    ```python
+    >>> model = {'x': DistributionParam(weights=[1, 0, 3])}
+    >>> batch = BatchModelSampler(model, k=100, random_state=0)
+    >>> samplers = batch.samplers()
+    >>> values = [s.categorical(['A', 'B', 'C'], handle='x') for s in samplers]
+    >>> values.count('A') + values.count('C'), values.count('B')
+    (100, 0)
+    >>> samplers[0].updates == {'x': [['A', 'B', 'C'].index(values[0])]}
+    True
+    >>> sorted(set(batch.merge_updates(range(10))['x']))
+    [0, 2]
+
+    ```
+    """
+
+    def __init__(self, model: Dict = None, k: int = 1, random_state: int = None):
+        self.model: Dict = {} if model is None else model
+        self.k = k
+        self.rand = random.Random(random_state)
+        self._rng = np.random.default_rng(random_state)
+        self._draws: Dict = {}
+        self._counts: Dict = {}
+        self._choices = set()
+
+    def samplers(self) -> List["ModelSampler"]:
+        """
+        Returns the `k` samplers of this batch, one per candidate.
+        """
+        return [_BatchLane(self, i) for i in range(self.k)]
+
+    def merge_updates(self, lanes: Sequence[int]) -> Dict:
+        """
+        Returns the combined updates of the candidates in `lanes`, like `merge_updates`
+        applied to the `updates` of their samplers.
+        """
+        result = {}
+
+        for key, draws in self._draws.items():
+            counts = self._counts[key]
+
+            for j, values in enumerate(draws):
+                for lane in lanes:
+                    if counts[lane] > j:
+                        update_key, value = self._update(key, values[lane])
+                        result.setdefault(update_key, []).append(value)
+
+        return result
+
+    def _update(self, key, value):
+        # Choices without a handle are updated by option, like in `ModelSampler`
+        if key in self._choices:
+            return key[value], 1
+
+        return key, value
+
+    def _draw(self, lane, key, sample_fn, *args):
+        try:
+            counts = self._counts[key]
+        except KeyError:
+            counts = self._counts[key] = [0] * self.k
+            self._draws[key] = []
+
+        draws = self._draws[key]
+        j = counts[lane]
+        counts[lane] = j + 1
+
+        if j == len(draws):
+            # Values are kept as Python scalars, just like `ModelSampler` produces them
+            draws.append(sample_fn(*args).tolist())
+
+        return draws[j][lane]
+
+    def _params(self, handle, default):
+        if handle not in self.model:
+            self.model[handle] = default()
+
+        return self.model[handle]
+
+    def _indices(self, weights):
+        p = np.asarray(weights, dtype=float)
+        return self._rng.choice(len(p), size=self.k, p=p / p.sum())
+
+    def _discrete(self, handle, min, max):
+        params = self._params(
+            handle, lambda: MeanDevParam(mean=(min + max) / 2, dev=(max - min))
+        )
+        values = np.trunc(self._rng.normal(params.mean, params.dev, size=self.k))
+        return np.clip(values, min, max).astype(int)
+
+    def _continuous(self, handle, min, max):
+        params = self._params(
+            handle, lambda: MeanDevParam(mean=(min + max) / 2, dev=(max - min))
+        )
+        return np.clip(self._rng.normal(params.mean, params.dev, size=self.k), min, max)
+
+    def _boolean(self, handle):
+        params = self._params(handle, lambda: WeightParam(value=0.5))
+        return self._rng.uniform(0, 1, size=self.k) < params.value
+
+    def _categorical(self, handle, options):
+        params = self._params(
+            handle, lambda: DistributionParam(weights=[1 for _ in options])
+        )
+        return self._indices(params.weights)
+
+    def _choice(self, options):
+        self._choices.add(options)
+        return self._indices(
+            [
+                self._params(option, lambda: UnormalizedWeightParam(value=1)).value
+                for option in options
+            ]
+        )
+
+
+class _BatchLane(ModelSampler):
+    # One of the candidates of a `BatchModelSampler`, its values come from the shared pool.
+    # The batch `rand` is also shared, since seeding one per candidate is too slow.
+
+    def __init__(self, batch: BatchModelSampler, lane: int):
+        self.rand = batch.rand
+        self._model = batch.model
+        self._updates = {}
+        self._batch = batch
+        self._lane = lane
+
+    @property
+    def updates(self):
+        # Values that could not be pooled are recorded as in any `ModelSampler`
+        return merge_updates(self._batch.merge_updates([self._lane]), self._updates)
+
+    def choice(self, options, handle=None):
+        if handle is not None:
+            return self.categorical(options, handle)
+
+        try:
+            options = tuple(options)
+            idx = self._batch._draw(self._lane, options, self._batch._choice, options)
+        except TypeError:
+            # Unhashable options cannot be pooled
+            return super().choice(options)
+
+        return options[idx]
+
+    def discrete(self, min=0, max=10, handle=None):
+        if handle is None:
+            return super().discrete(min, max, handle)
+
+        return self._batch._draw(
+            self._lane, handle, self._batch._discrete, handle, min, max
+        )
+
+    def continuous(self, min=0, max=1, handle=None):
+        if handle is None:
+            return super().continuous(min, max, handle)
+
+        return self._batch._draw(
+            self._lane, handle, self._batch._continuous, handle, min, max
+        )
+
+    def boolean(self, handle=None):
+        if handle is None:
+            return super().boolean(handle)
+
+        return self._batch._draw(self._lane, handle, self._batch._boolean, handle)
+
+    def categorical(self, options, handle=None):
+        if handle is None:
+            return super().categorical(options, handle)
+
+        idx = self._batch._draw(
+            self._lane, handle, self._batch._categorical, handle, options
+        )
+        return options[idx]
+
+
 class ReplaySampler:
     """
     A sampler that records the generated values and then can replay the
@@ -248,7 +444,7 @@ class ReplaySampler:
     >>> sampler.replay().discrete(0,5)
     Traceback (most recent call last):
         ...
-    TypeError: Invalid invocation of `discrete` with `args=(0, 5)`, replay history says args='(0, 10)'.
+    TypeError: Invalid invocation of `discrete` with `args=(0, 5)` and `kwargs={}`, they differ from the replay history.
 
     >>> sampler.replay().boolean()
     Traceback (most recent call last):
@@ -256,60 +452,214 @@ class ReplaySampler:
     TypeError: Invalid invocation of `boolean`, replay history says discrete comes next.
 
     ```
+
+    The history is stored by columns: a method code, a hash of the arguments and a
+    typed result per step. Options returned by `choice` and `categorical` are stored
+    by their index, so the history is just numbers that can be cheaply pickled,
+    sent to remote workers (see `dumps` and `loads`) or used as a cache key (see `digest`).
     """
 
     RECORD = "record"
     REPLAY = "replay"
 
+    METHODS = ("choice", "distribution", "discrete", "continuous", "boolean", "categorical")
+
+    # Kinds of results, all but objects are stored as 64 bits integers
+    _INT, _FLOAT, _BOOL, _OPTION, _OBJECT = range(5)
+
+    _MAGIC = b"AGRS\x01"
+
     def __init__(self, sampler):
         self.sampler = sampler
         self._mode = ReplaySampler.RECORD
-        self._history = []
-        self._current_history = []
+        self._codes = bytearray()
+        self._kinds = bytearray()
+        self._signatures = array.array("Q")
+        self._values = array.array("q")
+        self._objects = []
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self._codes)
 
     def _run(self, method, *args, **kwargs):
+        code = _METHOD_CODES[method]
+        signature = _signature(args, kwargs)
+
         if self._mode == ReplaySampler.RECORD:
             result = getattr(self.sampler, method)(*args, **kwargs)
-            self._history.append(
-                dict(method=method, args=repr(args), kwargs=repr(kwargs), result=result)
-            )
+            kind, value = self._encode(result, args, kwargs)
+
+            self._codes.append(code)
+            self._kinds.append(kind)
+            self._signatures.append(signature)
+            self._values.append(value)
 
             return result
 
         elif self._mode == ReplaySampler.REPLAY:
-            if not self._current_history:
+            i = self._cursor
+
+            if i >= len(self._codes):
                 raise TypeError(
                     f"Invalid invocation of `{method}`, replay history is empty. Maybe you forgot to call `replay`?"
                 )
 
-            top = self._current_history[0]
-
-            if top["method"] != method:
+            if self._codes[i] != code:
                 raise TypeError(
                     f"Invalid invocation of `{method}`, "
-                    f"replay history says {top['method']} comes next."
+                    f"replay history says {ReplaySampler.METHODS[self._codes[i]]} comes next."
                 )
 
-            if top["args"] != repr(args):
+            if self._signatures[i] != signature:
                 raise TypeError(
-                    f"Invalid invocation of `{method}` with `args={repr(args)}`, "
-                    f"replay history says args={repr(top['args'])}."
+                    f"Invalid invocation of `{method}` with `args={repr(args)}` and `kwargs={repr(kwargs)}`, "
+                    f"they differ from the replay history."
                 )
 
-            if top["kwargs"] != repr(kwargs):
-                raise TypeError(
-                    f"Invalid invocation of `{method}` with `kwargs={repr(kwargs)}`, "
-                    f"replay history says kwargs={repr(top['kwargs'])}."
-                )
+            self._cursor = i + 1
+            return self._decode(self._kinds[i], self._values[i], args, kwargs)
+
+    def _encode(self, result, args, kwargs):
+        # Exact types, since e.g. `bool` or `numpy` scalars must be replayed as such
+        if type(result) is bool:
+            return ReplaySampler._BOOL, int(result)
+
+        if type(result) is int and -(2 ** 63) <= result < 2 ** 63:
+            return ReplaySampler._INT, result
+
+        if type(result) is float:
+            return ReplaySampler._FLOAT, _FLOAT_AS_INT.unpack(_FLOAT.pack(result))[0]
+
+        for i, option in enumerate(_options(args, kwargs)):
+            if option is result:
+                return ReplaySampler._OPTION, i
+
+        self._objects.append(result)
+        return ReplaySampler._OBJECT, len(self._objects) - 1
+
+    def _decode(self, kind, value, args, kwargs):
+        if kind == ReplaySampler._INT:
+            return value
+
+        if kind == ReplaySampler._BOOL:
+            return bool(value)
+
+        if kind == ReplaySampler._FLOAT:
+            return _FLOAT.unpack(_FLOAT_AS_INT.pack(value))[0]
+
+        if kind == ReplaySampler._OPTION:
+            return _options(args, kwargs)[value]
+
+        return self._objects[value]
 
-            self._current_history.pop(0)
-            return top["result"]
+    def steps(self):
+        """
+        Iterates over the recorded history as `(method, signature, value)` tuples,
+        where `signature` is the hash of the arguments and `value` is the index
+        of the option for `choice` and `categorical`.
+        """
+        for i in range(len(self._codes)):
+            kind, value = self._kinds[i], self._values[i]
+
+            if kind == ReplaySampler._FLOAT:
+                value = _FLOAT.unpack(_FLOAT_AS_INT.pack(value))[0]
+            elif kind == ReplaySampler._BOOL:
+                value = bool(value)
+            elif kind == ReplaySampler._OBJECT:
+                value = self._objects[value]
+
+            yield ReplaySampler.METHODS[self._codes[i]], self._signatures[i], value
 
     def replay(self) -> "ReplaySampler":
         self._mode = ReplaySampler.REPLAY
-        self._current_history = list(self._history)
+        self._cursor = 0
         return self
 
+    def digest(self) -> str:
+        """
+        Returns a canonical hash of the recorded history, that identifies
+        the sampled configuration regardless of the sampler that produced it.
+
+        ##### Examples
+
+        ```python
+        >>> sampler = ReplaySampler(Sampler(random_state=0))
+        >>> [sampler.discrete(0, 10) for _ in range(3)]
+        [6, 6, 0]
+        >>> other = ReplaySampler(Sampler(random_state=1))
+        >>> [other.discrete(0, 10) for _ in range(3)]
+        [2, 9, 1]
+        >>> sampler.digest() == other.digest()
+        False
+
+        Replaying the same configuration yields the same digest:
+
+        >>> import io
+        >>> fp = io.BytesIO()
+        >>> sampler.replay().save(fp)
+        >>> fp.seek(0)
+        0
+        >>> sampler.digest() == ReplaySampler.load(fp).digest()
+        True
+
+        ```
+        """
+        return hashlib.sha1(self.dumps()).hexdigest()
+
+    def dumps(self) -> bytes:
+        """
+        Returns the recorded history in a compact binary format, that doesn't depend on
+        the platform. Results that are not numbers nor options (if any) are pickled.
+        """
+        columns = [self._signatures, self._values]
+
+        if sys.byteorder == "big":
+            columns = [array.array(c.typecode, c) for c in columns]
+
+            for c in columns:
+                c.byteswap()
+
+        header = ReplaySampler._MAGIC + struct.pack("<I", len(self._codes))
+        data = [header, bytes(self._codes), bytes(self._kinds)]
+        data.extend(c.tobytes() for c in columns)
+
+        if self._objects:
+            data.append(pickle.dumps(self._objects))
+
+        return b"".join(data)
+
+    @staticmethod
+    def loads(data: bytes) -> "ReplaySampler":
+        """
+        Creates a `ReplaySampler` from the output of `dumps` and returns it already in
+        replay mode.
+        """
+        magic = ReplaySampler._MAGIC
+
+        if data[: len(magic)] != magic:
+            raise ValueError("Not a serialized `ReplaySampler` history.")
+
+        n = struct.unpack_from("<I", data, len(magic))[0]
+        start = len(magic) + 4
+
+        sampler = ReplaySampler(None)
+        sampler._codes = bytearray(data[start : start + n])
+        sampler._kinds = bytearray(data[start + n : start + 2 * n])
+        start += 2 * n
+
+        for column in (sampler._signatures, sampler._values):
+            column.frombytes(data[start : start + 8 * n])
+            start += 8 * n
+
+            if sys.byteorder == "big":
+                column.byteswap()
+
+        if start < len(data):
+            sampler._objects = pickle.loads(data[start:])
+
+        return sampler.replay()
+
     def save(self, fp):
         """
         Saves the state of a `ReplaySampler` to a stream. It must be in replay mode.
@@ -318,7 +668,7 @@ class ReplaySampler:
 
         ##### Examples
 
-        In this example we create a sampler, and save its state into a `StringIO`
+        In this example we create a sampler, and save its state into a `BytesIO`
         stream to be able to see what's being saved.
 
         ```python
@@ -330,7 +680,7 @@ class ReplaySampler:
         >>> fp = io.BytesIO()
         >>> sampler.replay().save(fp)
         >>> len(fp.getvalue())
-        183
+        63
 
         ```
         """
@@ -339,7 +689,7 @@ class ReplaySampler:
                 "A sampler must be in replay mode, i.e., call the `replay()` method."
             )
 
-        pickle.Pickler(fp).dump(self._history)
+        fp.write(self.dumps())
 
     @staticmethod
     def load(fp) -> "ReplaySampler":
@@ -368,10 +718,16 @@ class ReplaySampler:
         [7, 7, 7, 10, 6]
 
         """
-        history = pickle.Unpickler(fp).load()
-        sampler = ReplaySampler(None)
-        sampler._history = history
-        return sampler.replay()
+        return ReplaySampler.loads(fp.read())
+
+    def __getstate__(self):
+        # The wrapped sampler is not needed for replaying
+        return dict(history=self.dumps(), mode=self._mode, cursor=self._cursor)
+
+    def __setstate__(self, state):
+        self.__dict__.update(ReplaySampler.loads(state["history"]).__dict__)
+        self._mode = state["mode"]
+        self._cursor = state["cursor"]
 
     def choice(self, *args, **kwargs):
         return self._run("choice", *args, **kwargs)
@@ -398,6 +754,21 @@ class ReplaySampler:
         return getattr(self.sampler, attr)
 
 
+_METHOD_CODES = {method: i for i, method in enumerate(ReplaySampler.METHODS)}
+_FLOAT = struct.Struct("<d")
+_FLOAT_AS_INT = struct.Struct("<q")
+
+
+def _signature(args, kwargs) -> int:
+    data = (repr(args) + repr(kwargs)).encode("utf8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _options(args, kwargs):
+    options = args[0] if args else kwargs.get("options", ())
+    return options if isinstance(options, (list, tuple)) else ()
+
+
 class ModelParam(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def update(self, alpha: float, updates) -> "ModelParam":
@@ -560,6 +931,80 @@ def best_indices(values: List, k: int = 1, maximize: bool = False) -> List[int]:
         return [i for i in range(len(values)) if indices[i] < threshold]
 
 
+def dominates(a: Sequence, b: Sequence, maximize: Sequence[bool]) -> bool:
+    """
+    Returns whether the multi-objective value `a` Pareto-dominates `b`, i.e., `a` is
+    not worse than `b` in any objective, and it is strictly better in at least one.
+
+    ##### Examples
+
+    ```python
+    >>> dominates((0.9, 1.0), (0.8, 2.0), maximize=(True, False))
+    True
+    >>> dominates((0.9, 3.0), (0.8, 2.0), maximize=(True, False))
+    False
+
+    ```
+    """
+    better = False
+
+    for x, y, m in zip(a, b, maximize):
+        if x == y:
+            continue
+
+        if (x > y) != m:
+            return False
+
+        better = True
+
+    return better
+
+
+def non_dominated_sort(values: List[Sequence], maximize: Sequence[bool]) -> List[List[int]]:
+    """
+    Sorts multi-objective values into successive Pareto fronts.
+
+    ##### Returns:
+
+    * `fronts: List[List[int]]`: Indices of the values in each front. The first front holds the non-dominated values,
+      the second one those only dominated by the first front, and so on.
+
+    ##### Examples
+
+    ```python
+    >>> non_dominated_sort([(0.9, 3.0), (0.8, 1.0), (0.7, 2.0), (0.6, 3.0)], maximize=(True, False))
+    [[0, 1], [2], [3]]
+
+    ```
+    """
+    dominated_by = [0] * len(values)
+    dominating = [[] for _ in values]
+
+    for i, a in enumerate(values):
+        for j, b in enumerate(values):
+            if dominates(a, b, maximize):
+                dominating[i].append(j)
+                dominated_by[j] += 1
+
+    fronts = []
+    front = [i for i in range(len(values)) if dominated_by[i] == 0]
+
+    while front:
+        fronts.append(front)
+        next_front = []
+
+        for i in front:
+            for j in dominating[i]:
+                dominated_by[j] -= 1
+
+                if dominated_by[j] == 0:
+                    next_front.append(j)
+
+        front = sorted(next_front)
+
+    return fronts
+
+
 def merge_updates(*updates: Sequence[Dict]) -> Dict:
     """
     Merges a bunch of update dicts from `ModelSampler`
@@ -597,9 +1042,30 @@ def merge_updates(*updates: Sequence[Dict]) -> Dict:
     return result
 
 
-class ExhaustiveSampler:
+class ExhaustiveSampler(Sampler):
     """
     Performs an exhaustive sampling of the parameter space.
+
+    Every call to `finish` marks the current instance as done, and the next one will follow
+    a different sequence of decisions, until the space is `exhausted`. Continuous ranges
+    (and discrete ones with more than `resolution` values) are discretized into
+    `resolution` evenly spaced values.
+
+    ##### Examples
+
+    ```python
+    >>> sampler = ExhaustiveSampler()
+    >>> instances = []
+    >>> while not sampler.exhausted:
+    ...     if sampler.boolean():
+    ...         instances.append((True, sampler.categorical(['A', 'B'])))
+    ...     else:
+    ...         instances.append((False, sampler.discrete(0, 2)))
+    ...     sampler.finish()
+    >>> instances
+    [(False, 0), (False, 1), (False, 2), (True, 'A'), (True, 'B')]
+
+    ```
     """
 
     # The way this sampler works is by building an explicit representation of
@@ -631,8 +1097,25 @@ class ExhaustiveSampler:
     # tell this sampler when we finished with one instance. Otherwise we can't know when
     # did we reach a leaf.
 
-    def __init__(self) -> None:
-        self._root = ExhaustiveSampler.Node()
+    def __init__(self, resolution: int = 10) -> None:
+        super().__init__()
+        self.resolution = resolution
+        self._root = ExhaustiveSampler.Node(None)
+        self._current_node = self._root
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Whether all the instances in the parameter space have been sampled.
+        """
+        return self._root.exhausted
+
+    def finish(self):
+        """
+        Marks the current instance as done, and starts the next one from the root.
+        """
+        # The node reached after the last decision is a leaf of the tree
+        self._current_node.mark_exhausted()
         self._current_node = self._root
 
     def _sample_next(self, distribution, params, handle):
@@ -643,23 +1126,88 @@ class ExhaustiveSampler:
         if not self._current_node.is_initialized():
             self._current_node.initialize(distribution, params, handle)
 
+        elif self._current_node.distribution != distribution:
+            raise ValueError(
+                f"Expected `{self._current_node.distribution}` but `{distribution}` was invoked. "
+                "The sampled structure must only depend on previously sampled values."
+            )
+
         # Then we'll sample from that node, which in this case will only return the next
         # value. At the same time, we'll recurse down the corresponding children.
 
         self._current_node, value = self._current_node.sample()
         return value
 
+    def choice(self, options, handle=None):
+        return self._sample_next("categorical", dict(options=options), handle)
+
+    def categorical(self, options, handle=None):
+        return self._sample_next("categorical", dict(options=options), handle)
+
+    def boolean(self, handle=None):
+        return self._sample_next("boolean", {}, handle)
+
+    def discrete(self, min=0, max=10, handle=None):
+        params = dict(min=min, max=max, resolution=self.resolution)
+        return self._sample_next("discrete", params, handle)
+
+    def continuous(self, min=0, max=1, handle=None):
+        params = dict(min=min, max=max, resolution=self.resolution)
+        return self._sample_next("continuous", params, handle)
+
     class Node:
+        def __init__(self, parent) -> None:
+            self.parent = parent
+            self.exhausted = False
+
         def is_initialized(self) -> bool:
             return hasattr(self, "handle")
 
         def initialize(self, distribution, params, handle) -> None:
             self.handle = handle
+            self.distribution = distribution
             self.values = getattr(self, f"initialize_{distribution}")(**params)
 
             # In this dictionary we will store as values the nodes that represents the distributions
             # that will be invoked after returning the corresponding result stored at each key.
             self.children = {}
 
+        def initialize_categorical(self, options):
+            return list(options)
+
+        def initialize_boolean(self):
+            return [False, True]
+
+        def initialize_discrete(self, min, max, resolution):
+            if max - min < resolution:
+                return list(range(min, max + 1))
+
+            return sorted(set(int(round(x)) for x in np.linspace(min, max, resolution)))
+
+        def initialize_continuous(self, min, max, resolution):
+            return [float(x) for x in np.linspace(min, max, resolution)]
+
         def sample(self):
-            pass
+            # Values are enumerated in order, skipping those whose subtree is exhausted
+            for i, value in enumerate(self.values):
+                child = self.children.get(i)
+
+                if child is None:
+                    child = self.children[i] = ExhaustiveSampler.Node(self)
+
+                if not child.exhausted:
+                    return child, value
+
+            raise ValueError("All the values of `%s` were already sampled." % self.handle)
+
+        def mark_exhausted(self):
+            self.exhausted = True
+            parent = self.parent
+
+            # A node is exhausted when all its values have exhausted subtrees
+            while parent is not None and len(parent.children) == len(parent.values):
+                if not all(c.exhausted for c in parent.children.values()):
+                    break
+
+                parent.exhausted = True
+                parent = parent.parent
@@ -6,7 +6,13 @@ from ._base import (
     MemoryLogger,
     RichLogger,
     JsonLogger,
+    JsonLinesLogger,
+    read_json_lines,
+    ProfileLogger,
 )
 from ._random import RandomSearch
-from ._pge import ModelSampler, PESearch
+from ._grid import GridSearch
+from ._pge import ModelSampler, PESearch, AsyncPESearch
 from ._learning import SurrogateSearch
+from ._distributed import SearchCoordinator, SearchWorker
+from ._cost import CostModel
@@ -1,16 +1,39 @@
 import logging
 import enlighten
+import pickle
+import random
 import time
 import datetime
 import statistics
 import math
+import os
 import termcolor
 import json
+import threading
+import numpy as np
+
+from concurrent.futures import (
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    FIRST_COMPLETED,
+    wait,
+)
 
 import autogoal.logging
 
-from autogoal.utils import RestrictedWorkerByJoin, Min, Gb, Sec
-from autogoal.sampling import ReplaySampler
+from autogoal.utils import (
+    EvaluationResult,
+    RestrictedWorkerByJoin,
+    RestrictedWorkerPool,
+    Min,
+    Gb,
+    Sec,
+    pretty_repr,
+    structural_key,
+)
+from autogoal.exceptions import PrunedEvaluation
+from autogoal.sampling import ReplaySampler, best_indices, dominates
 from rich.progress import Progress
 from rich.panel import Panel
 
@@ -29,6 +52,16 @@ class SearchAlgorithm:
         search_timeout: int = 5 * Min,
         target_fn=None,
         allow_duplicates=True,
+        n_jobs: int = 1,
+        executor=None,
+        persistent_workers: bool = False,
+        fitness_cache=None,
+        min_budget: float = None,
+        eta: int = 3,
+        racing: bool = False,
+        checkpoint: str = None,
+        checkpoint_every: int = 1,
+        cost_model=None,
     ):
         if generator_fn is None and fitness_fn is None:
             raise ValueError("You must provide either `generator_fn` or `fitness_fn`")
@@ -44,15 +77,79 @@ class SearchAlgorithm:
         self._search_timeout = search_timeout
         self._target_fn = target_fn
         self._allow_duplicates = allow_duplicates
-
-        if self._evaluation_timeout > 0 or self._memory_limit > 0:
+        self._n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self._executor = executor
+        self._fitness_cache = fitness_cache
+        self._min_budget = min_budget
+        self._eta = eta
+        self._bracket = 0
+        self._rungs = {}
+        self._racing = racing
+        self._best_fn = None
+        self._checkpoint = checkpoint
+        self._checkpoint_every = checkpoint_every
+        self._cost_model = cost_model
+        self._start_time = None
+        self._multi_objective = isinstance(maximize, (tuple, list))
+        self._front = []
+
+        if self._multi_objective and min_budget is not None:
+            raise ValueError("Multi-fidelity evaluation requires a single objective.")
+
+        if persistent_workers:
+            # Long-lived workers are reused between evaluations, so cheap pipelines
+            # don't pay for spawning a new process every time.
+            self._fitness_fn = RestrictedWorkerPool(
+                self._fitness_fn,
+                self._evaluation_timeout or None,
+                self._memory_limit or None,
+                size=max(1, self._n_jobs),
+            )
+        elif self._evaluation_timeout > 0 or self._memory_limit > 0:
             self._fitness_fn = RestrictedWorkerByJoin(
                 self._fitness_fn, self._evaluation_timeout, self._memory_limit
             )
 
-    def run(self, generations=None, logger=None):
+    def run(self, generations=None, logger=None, resume_from=None):
         """Runs the search performing at most `generations` of `fitness_fn`.
 
+        If the search was built with `n_jobs > 1` (or an explicit `executor`), all the
+        candidates of a generation are evaluated concurrently, each one still under its
+        own time and memory restrictions. Fitness values are always reported to
+        `_finish_generation` in the order in which the candidates were sampled.
+
+        If the search was built with a `fitness_cache` (a `FitnessCache` instance),
+        candidates whose sampled configuration was already evaluated reuse the cached
+        fitness instead of being evaluated again.
+
+        If the search was built with a `min_budget`, each generation is a Hyperband bracket:
+        all candidates are first evaluated calling `fitness_fn(solution, budget=b)` with a
+        small fraction `b` of the data, and only the best `1/eta` of them move up to a
+        budget `eta` times larger, until the full budget (`b=1`) is reached. Consecutive
+        generations cycle through brackets starting at budgets `min_budget`, `min_budget * eta`,
+        and so on. Only full-budget evaluations can become the best solution.
+
+        If the search was built with `racing=True` (and `maximize=True`), `fitness_fn` is called
+        with the keyword argument `best_fitness` (once there is one), so it can abort hopeless
+        evaluations by raising `PrunedEvaluation` (see `supervised_fitness_fn`). Pruned
+        candidates are reported to `Logger.prune_solution` with their partial fitness.
+
+        If the search was built with a `checkpoint` path, the state of the search is atomically
+        saved there every `checkpoint_every` generations. Passing that path as `resume_from`
+        continues a previous run from its last checkpoint, with the remaining generations.
+
+        If the search was built with a `cost_model` (a `CostModel` instance), it learns how
+        long each evaluation takes. Each evaluation then gets a wall-clock timeout based on its
+        predicted time instead of the fixed `evaluation_timeout`, and candidates whose predicted
+        time exceeds the remaining `search_timeout` are discarded without being evaluated.
+        Only completed and timed out evaluations are learned from, and no evaluation is
+        started once the `search_timeout` has expired.
+
+        If `maximize` is a tuple of booleans, the search is multi-objective: `fitness_fn` must
+        return a tuple with one value per objective, and the search keeps the Pareto front of
+        non-dominated solutions. In that case, `best` and `fn` are lists with the solutions in
+        the front and their fitness.
+
         Returns:
             Tuple `(best, fn)` of the best found solution and its corresponding fitness.
         """
@@ -75,8 +172,32 @@ class SearchAlgorithm:
         no_improvement = 0
         start_time = time.time()
         seen = set()
+        self._best_fn = None
+        self._start_time = start_time
+        self._front = []
+        finished = 0
+
+        if resume_from is not None:
+            state = self._load_checkpoint(resume_from)
+            generations = state["generations"]
+            early_stop = state["early_stop"]
+            no_improvement = state["no_improvement"]
+            start_time -= state["spent_time"]
+            self._start_time = start_time
+            seen = state["seen"]
+            finished = state["finished"]
+
+            if state["best_history"] is not None:
+                best_solution = self._replay(state["best_history"])
+                best_fn = self._best_fn = state["best_fn"]
+
+            if state.get("front"):
+                self._front = [(self._replay(h), fn) for h, fn in state["front"]]
+                best_solution = [s for s, _ in self._front]
+                best_fn = [fn for _, fn in self._front]
 
         logger.begin(generations, self._pop_size)
+        executor = self._start_executor()
 
         try:
             while generations > 0:
@@ -85,42 +206,30 @@ class SearchAlgorithm:
                 logger.start_generation(generations, best_fn)
                 self._start_generation()
 
-                fns = []
+                fns = {}
+                solutions = {}
 
                 improvement = False
 
-                for _ in range(self._pop_size):
-                    solution = None
-
-                    try:
-                        solution = self._generate()
-                    except Exception as e:
-                        logger.error(
-                            "Error while generating solution: %s" % e, solution
-                        )
-                        continue
-
-                    if not self._allow_duplicates and repr(solution) in seen:
-                        continue
-
-                    try:
-                        logger.sample_solution(solution)
-                        fn = self._fitness_fn(solution)
-                    except Exception as e:
-                        fn = -math.inf if self._maximize else math.inf
-                        logger.error(e, solution)
-
-                        if self._errors == "raise":
-                            logger.end(best_solution, best_fn)
-                            raise e from None
+                for index, solution, fn in self._run_generation(
+                    logger, seen, executor
+                ):
+                    logger.eval_solution(solution, fn)
+                    fns[index] = fn
+                    solutions[index] = solution
 
-                    if not self._allow_duplicates:
-                        seen.add(repr(solution))
+                    # Discarded at a lower budget, not comparable with full evaluations
+                    comparable = self._rungs.get(index, 0) >= 0
 
-                    logger.eval_solution(solution, fn)
-                    fns.append(fn)
+                    if comparable and self._multi_objective:
+                        # There is no single best solution, but a front of non-dominated ones
+                        if self._update_front(solution, fn):
+                            logger.update_best(solution, fn, best_solution, best_fn)
+                            best_solution = [s for s, _ in self._front]
+                            best_fn = [f for _, f in self._front]
+                            improvement = True
 
-                    if (
+                    elif comparable and (
                         best_fn is None
                         or (fn > best_fn and self._maximize)
                         or (fn < best_fn and not self._maximize)
@@ -128,6 +237,7 @@ class SearchAlgorithm:
                         logger.update_best(solution, fn, best_solution, best_fn)
                         best_solution = solution
                         best_fn = fn
+                        self._best_fn = fn
                         improvement = True
 
                         if self._target_fn and best_fn >= self._target_fn:
@@ -143,6 +253,12 @@ class SearchAlgorithm:
                         stop = True
                         break
 
+                # Fitness values are reported in sampling order, no matter in
+                # which order the evaluations actually finished.
+                ranking = [self._rank(index, fns[index]) for index in sorted(fns)]
+                fns = [fns[index] for index in sorted(fns)]
+                self._evaluated = [solutions[index] for index in sorted(solutions)]
+
                 if not improvement:
                     no_improvement += 1
                 else:
@@ -157,6 +273,13 @@ class SearchAlgorithm:
                     stop = True
                     break
 
+                if self._exhausted():
+                    autogoal.logging.logger().info(
+                        "(!) Stopping since the search space is exhausted."
+                    )
+                    stop = True
+                    break
+
                 if early_stop and no_improvement >= early_stop:
                     autogoal.logging.logger().info(
                         "(!) Stopping since no improvement for %i generations."
@@ -166,7 +289,29 @@ class SearchAlgorithm:
                     break
 
                 logger.finish_generation(fns)
-                self._finish_generation(fns)
+                self._finish_generation(ranking)
+
+                if self._fitness_cache is not None:
+                    self._fitness_cache.sync()
+
+                finished += 1
+
+                if self._checkpoint and finished % self._checkpoint_every == 0:
+                    self._save_checkpoint(
+                        dict(
+                            generations=generations,
+                            early_stop=early_stop,
+                            no_improvement=no_improvement,
+                            spent_time=time.time() - start_time,
+                            seen=seen,
+                            finished=finished,
+                            best_history=None
+                            if self._multi_objective or best_solution is None
+                            else best_solution.sampler_.dumps(),
+                            best_fn=best_fn,
+                            front=[(s.sampler_.dumps(), f) for s, f in self._front],
+                        )
+                    )
 
                 if stop:
                     break
@@ -174,9 +319,446 @@ class SearchAlgorithm:
         except KeyboardInterrupt:
             pass
 
+        except Exception:
+            logger.end(best_solution, best_fn)
+            raise
+
+        finally:
+            self._stop_executor(executor)
+
+            if self._fitness_cache is not None:
+                self._fitness_cache.sync()
+
+            if isinstance(self._fitness_fn, RestrictedWorkerPool):
+                self._fitness_fn.shutdown()
+
         logger.end(best_solution, best_fn)
         return best_solution, best_fn
 
+    def _run_generation(self, logger, seen, executor):
+        """Samples and evaluates one generation.
+
+        Yields tuples `(index, solution, fn)` where `index` is the position
+        in which `solution` was sampled, in the order evaluations finish.
+        """
+        self._rungs = {}
+
+        if self._min_budget is not None:
+            yield from self._run_bracket(logger, seen, executor)
+            return
+
+        if executor is None:
+            for index in range(self._pop_size):
+                solution = self._sample_solution(logger, seen)
+
+                if solution is None:
+                    continue
+
+                logger.sample_solution(solution)
+                fn = self._evaluate_solution(
+                    lambda: self._call_fitness(solution, **self._fitness_kwargs()),
+                    solution,
+                    logger,
+                )
+                yield index, solution, fn
+
+            return
+
+        # When evaluating concurrently, the whole population is sampled upfront
+        # and dispatched at once. Sampling always happens in this thread, so
+        # search strategies see exactly the same sequence of calls as in the
+        # sequential case.
+        pending = {}
+        cached = []
+
+        for index in range(self._pop_size):
+            solution = self._sample_solution(logger, seen)
+
+            if solution is None:
+                continue
+
+            logger.sample_solution(solution)
+            fn = self._cached_fitness(solution)
+
+            if fn is not None:
+                cached.append((index, solution, fn))
+                continue
+
+            future = executor.submit(
+                self._call_fitness, solution, **self._fitness_kwargs()
+            )
+            pending[future] = (index, solution)
+
+        yield from cached
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index, solution = pending.pop(future)
+                    fn = self._evaluate_solution(future.result, solution, logger)
+                    yield index, solution, fn
+        finally:
+            # If the consumer stopped early, drop the evaluations that haven't started yet.
+            for future in pending:
+                future.cancel()
+
+    def _run_bracket(self, logger, seen, executor):
+        budgets = self._bracket_budgets()
+        candidates = []
+
+        for index in range(self._pop_size):
+            solution = self._sample_solution(logger, seen)
+
+            if solution is not None:
+                logger.sample_solution(solution)
+                candidates.append((index, solution))
+
+        for rung, budget in enumerate(budgets):
+            fns = self._evaluate_all(candidates, budget, logger, executor)
+
+            if rung == len(budgets) - 1:
+                yield from ((i, s, fn) for (i, s), fn in zip(candidates, fns))
+                return
+
+            keep = set(
+                best_indices(
+                    fns, k=max(1, len(fns) // self._eta), maximize=self._maximize
+                )
+            )
+
+            # Rungs of discarded candidates are negative, counting down from the full budget
+            for position, ((index, solution), fn) in enumerate(zip(candidates, fns)):
+                if position not in keep:
+                    self._rungs[index] = rung - len(budgets) + 1
+                    yield index, solution, fn
+
+            candidates = [candidates[position] for position in sorted(keep)]
+
+    def _bracket_budgets(self):
+        # Number of times the budget can be multiplied by `eta` before reaching the full data
+        steps = int(math.floor(math.log(1 / self._min_budget, self._eta) + 1e-9))
+        start = steps - self._bracket % (steps + 1)
+        self._bracket += 1
+
+        return [self._eta ** -i for i in range(start, -1, -1)]
+
+    def _evaluate_all(self, candidates, budget, logger, executor):
+        if executor is None:
+            return [
+                self._evaluate_solution(
+                    lambda: self._call_fitness(solution, **self._fitness_kwargs(budget)),
+                    solution,
+                    logger,
+                    budget,
+                )
+                for _, solution in candidates
+            ]
+
+        futures = [
+            executor.submit(self._call_fitness, solution, **self._fitness_kwargs(budget))
+            for _, solution in candidates
+        ]
+
+        return [
+            self._evaluate_solution(future.result, solution, logger, budget)
+            for future, (_, solution) in zip(futures, candidates)
+        ]
+
+    def _call_fitness(self, solution, **kwargs):
+        if self._cost_model is None:
+            return self._fitness_fn(solution, **kwargs)
+
+        budget = kwargs.get("budget")
+
+        timeout = self._fitness_timeout(solution, budget)
+        start = time.time()
+
+        try:
+            # Only restricted workers can enforce a different timeout for each call
+            if hasattr(self._fitness_fn, "run_with_timeout"):
+                result = self._fitness_fn.run_with_timeout(timeout, solution, **kwargs)
+            else:
+                result = self._fitness_fn(solution, **kwargs)
+        except TimeoutError:
+            # Timeouts are observed too, as a lower bound of the actual time
+            self._cost_model.observe(solution, time.time() - start, budget)
+            raise
+
+        self._cost_model.observe(solution, time.time() - start, budget)
+        return result
+
+    def _submit_fitness(self, solution, **kwargs):
+        """Same as `_call_fitness` with a restricted `fitness_fn`, but returns a `Future`."""
+        if self._cost_model is None:
+            return self._fitness_fn.submit_with_timeout(
+                self._fitness_fn.timeout or None, solution, **kwargs
+            )
+
+        budget = kwargs.get("budget")
+
+        try:
+            timeout = self._fitness_timeout(solution, budget)
+        except TimeoutError as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+        start = time.time()
+        future = self._fitness_fn.submit_with_timeout(timeout, solution, **kwargs)
+
+        def observe(future):
+            # Fast failures (e.g., a rejected memory limit) say nothing about the runtime
+            if future.exception() is None or isinstance(future.exception(), TimeoutError):
+                self._cost_model.observe(solution, time.time() - start, budget)
+
+        future.add_done_callback(observe)
+        return future
+
+    def _fitness_timeout(self, solution, budget):
+        timeout = self._cost_model.timeout(
+            solution, self._evaluation_timeout or None, budget
+        )
+        remaining = self._remaining_time()
+
+        if remaining is None:
+            return timeout
+
+        # Candidates are not even started once the search is out of time
+        if remaining <= 0:
+            raise TimeoutError("The search timeout has already expired.")
+
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def _remaining_time(self):
+        if not self._search_timeout or self._start_time is None:
+            return None
+
+        return max(0, self._search_timeout - (time.time() - self._start_time))
+
+    def _fitness_kwargs(self, budget=None):
+        kwargs = {}
+
+        if budget is not None:
+            kwargs["budget"] = budget
+
+        # Evaluations on a fraction of the data are not comparable with the best fitness
+        if (
+            self._racing
+            and self._maximize is True
+            and self._best_fn is not None
+            and (budget is None or budget >= 1)
+        ):
+            kwargs["best_fitness"] = self._best_fn
+
+        return kwargs
+
+    def _rank(self, index, fn):
+        if self._min_budget is None:
+            return fn
+
+        # Candidates that reached a larger budget always rank better
+        rung = self._rungs.get(index, 0)
+        return (rung, fn) if self._maximize else (-rung, fn)
+
+    def _save_checkpoint(self, state):
+        state["search"] = self._get_state()
+        state["random"] = (random.getstate(), np.random.get_state())
+        state["bracket"] = self._bracket
+
+        if self._cost_model is not None:
+            state["cost_model"] = self._cost_model._get_state()
+
+        # The cache is stored here only if it doesn't persist itself
+        if self._fitness_cache is not None and self._fitness_cache.path is None:
+            state["fitness_cache"] = list(self._fitness_cache.items())
+
+        # Write to a temporary file first, such that a crash never leaves a broken checkpoint
+        tmp = "%s.tmp" % self._checkpoint
+
+        with open(tmp, "wb") as fp:
+            pickle.dump(state, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+
+        os.replace(tmp, self._checkpoint)
+
+    def _load_checkpoint(self, path):
+        with open(path, "rb") as fp:
+            state = pickle.load(fp)
+
+        self._set_state(state["search"])
+        random.setstate(state["random"][0])
+        np.random.set_state(state["random"][1])
+        self._bracket = state.get("bracket", 0)
+
+        if self._cost_model is not None and "cost_model" in state:
+            self._cost_model._set_state(state["cost_model"])
+
+        if self._fitness_cache is not None and "fitness_cache" in state:
+            self._fitness_cache.update(state["fitness_cache"])
+
+        return state
+
+    def _replay(self, history):
+        sampler = ReplaySampler.loads(history)
+
+        if self._generator_fn is not None:
+            solution = self._generator_fn(sampler)
+        else:
+            solution = sampler
+
+        solution.sampler_ = sampler
+        return solution
+
+    def _get_state(self):
+        """
+        Returns the internal state of the search strategy that must be checkpointed.
+        """
+        return {}
+
+    def _set_state(self, state):
+        """
+        Restores the internal state returned by `_get_state`.
+        """
+        pass
+
+    def _sample_solution(self, logger, seen):
+        solution = None
+
+        if self._exhausted():
+            return None
+
+        try:
+            solution = self._generate()
+        except Exception as e:
+            logger.error("Error while generating solution: %s" % e, solution)
+            return None
+
+        if not self._allow_duplicates:
+            key = structural_key(solution)
+
+            if key in seen:
+                return None
+
+            seen.add(key)
+
+        if self._cost_model is not None:
+            expected = self._cost_model.predict(solution)
+            remaining = self._remaining_time()
+
+            if expected is not None and remaining is not None and expected > remaining:
+                logger.error(
+                    "Expected evaluation time %.2f exceeds the remaining %.2f seconds"
+                    % (expected, remaining),
+                    solution,
+                )
+                return None
+
+        return solution
+
+    def _evaluate_solution(self, compute_fn, solution, logger, budget=None):
+        fn = self._cached_fitness(solution, budget)
+
+        if fn is not None:
+            return fn
+
+        try:
+            fn = compute_fn()
+
+            if isinstance(fn, EvaluationResult):
+                logger.profile_solution(solution, fn.profile)
+                fn = fn.fitness
+        except PrunedEvaluation as e:
+            # Not cached, since it depends on the best fitness at the time
+            logger.prune_solution(solution, e.fitness)
+            return e.fitness
+        except Exception as e:
+            logger.error(e, solution)
+
+            if self._errors == "raise":
+                raise e from None
+
+            return self._worst_fitness()
+
+        key = self._cache_key(solution, budget)
+
+        if key is not None:
+            self._fitness_cache.put(key, fn)
+
+        self._observe_evaluation(solution, fn, budget)
+        return fn
+
+    def _observe_evaluation(self, solution, fn, budget=None):
+        """
+        Called for every evaluation of `fitness_fn` that actually completed, i.e.,
+        not for cache hits, pruned evaluations or errors.
+        """
+        pass
+
+    def _worst_fitness(self):
+        if self._multi_objective:
+            return tuple(-math.inf if m else math.inf for m in self._maximize)
+
+        return -math.inf if self._maximize else math.inf
+
+    def _update_front(self, solution, fn):
+        if not all(math.isfinite(f) for f in fn):
+            return False
+
+        for _, other in self._front:
+            if other == fn or dominates(other, fn, self._maximize):
+                return False
+
+        self._front = [
+            (s, f) for s, f in self._front if not dominates(fn, f, self._maximize)
+        ]
+        self._front.append((solution, fn))
+        return True
+
+    def _cache_key(self, solution, budget=None):
+        if self._fitness_cache is None:
+            return None
+
+        sampler = getattr(solution, "sampler_", None)
+
+        # Without a recorded history (e.g., when sampling happens inside `fitness_fn`)
+        # there is no way to identify the configuration.
+        if not isinstance(sampler, ReplaySampler) or not len(sampler):
+            return None
+
+        if budget is not None and budget < 1:
+            return "%s:%g" % (sampler.digest(), budget)
+
+        return sampler.digest()
+
+    def _cached_fitness(self, solution, budget=None):
+        key = self._cache_key(solution, budget)
+
+        if key is None:
+            return None
+
+        return self._fitness_cache.get(key)
+
+    def _start_executor(self):
+        if self._executor is not None:
+            return self._executor
+
+        if self._n_jobs > 1 and hasattr(self._fitness_fn, "submit_with_timeout"):
+            return _RestrictedExecutor(self, self._n_jobs)
+
+        if self._n_jobs > 1:
+            return ThreadPoolExecutor(max_workers=self._n_jobs)
+
+        return None
+
+    def _stop_executor(self, executor):
+        # Only shutdown executors owned by the search, pending evaluations
+        # are already cancelled and running ones are bound by their own timeout.
+        if executor is not None and executor is not self._executor:
+            executor.shutdown(wait=False)
+
     def _generate(self):
         # BUG: When multiprocessing is used for evaluation and no generation
         #      function is defined, the actual sampling occurs during fitness
@@ -200,8 +782,56 @@ class SearchAlgorithm:
         pass
 
     def _finish_generation(self, fns):
+        """
+        Receives the fitness of the candidates evaluated in the generation, in sampling order.
+
+        Candidates that were discarded before evaluation (e.g., duplicates) are not included,
+        the evaluated ones are in `self._evaluated`, in the same order as `fns`.
+        """
         pass
 
+    def _exhausted(self):
+        """
+        Returns whether there are no more solutions to sample, e.g., in an enumerating search.
+        """
+        return False
+
+
+class _RestrictedExecutor(Executor):
+    """
+    Evaluates up to `max_workers` solutions concurrently with a restricted `fitness_fn`.
+
+    Unlike a `ThreadPoolExecutor`, worker processes are started from the thread that
+    submits (i.e., the search loop), and threads only wait for them to finish.
+    Forking from executor threads leaves children with a copy of a thread they cannot
+    join on exit, besides any lock held by other threads at that moment.
+    """
+
+    def __init__(self, search: SearchAlgorithm, max_workers: int):
+        self._search = search
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def submit(self, fn, solution, **kwargs):
+        # `fn` is always `SearchAlgorithm._call_fitness`, which is split in `_submit_fitness`
+        self._slots.acquire()
+
+        try:
+            future = self._search._submit_fitness(solution, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+def _format_fitness(fn):
+    # Multi-objective fitness values are tuples, and the best of them a list (the front)
+    if isinstance(fn, (tuple, list)):
+        return "(%s)" % ", ".join(_format_fitness(f) for f in fn)
+
+    return "%.3f" % fn
+
 
 class Logger:
     def begin(self, generations, pop_size):
@@ -222,6 +852,12 @@ class Logger:
     def eval_solution(self, solution, fitness):
         pass
 
+    def prune_solution(self, solution, fitness):
+        pass
+
+    def profile_solution(self, solution, profile):
+        pass
+
     def error(self, e: Exception, solution):
         pass
 
@@ -253,7 +889,7 @@ class ConsoleLogger(Logger):
 
     @staticmethod
     def warn(text):
-        return termcolor.colored(text, color="orange")
+        return termcolor.colored(text, color="yellow")
 
     @staticmethod
     def err(text):
@@ -269,7 +905,7 @@ class ConsoleLogger(Logger):
 
         print(
             self.emph("New generation started"),
-            self.success(f"best_fn={float(best_fn or 0.0):0.3}"),
+            self.success("best_fn=%s" % _format_fitness(best_fn or 0.0)),
             self.primary(f"generations={generations}"),
             self.primary(f"elapsed={elapsed}"),
             self.primary(f"remaining={remaining}"),
@@ -279,20 +915,32 @@ class ConsoleLogger(Logger):
         print(self.err("(!) Error evaluating pipeline: %s" % e))
 
     def end(self, best, best_fn):
-        print(self.emph("Search completed: best_fn=%.3f, best=\n%r" % (best_fn, best)))
+        print(
+            self.emph(
+                "Search completed: best_fn=%s, best=\n%s"
+                % (_format_fitness(best_fn), pretty_repr(best))
+            )
+        )
 
     def sample_solution(self, solution):
         print(self.emph("Evaluating pipeline:"))
-        print(solution)
+        print(pretty_repr(solution))
 
     def eval_solution(self, solution, fitness):
-        print(self.primary("Fitness=%.3f" % fitness))
+        print(self.primary("Fitness=%s" % _format_fitness(fitness)))
+
+    def prune_solution(self, solution, fitness):
+        print(
+            self.warn(
+                "(!) Pruned evaluation: partial fitness=%s" % _format_fitness(fitness)
+            )
+        )
 
     def update_best(self, new_best, new_fn, previous_best, previous_fn):
         print(
             self.success(
-                "Best solution: improved=%.3f, previous=%.3f"
-                % (new_fn, previous_fn or 0)
+                "Best solution: improved=%s, previous=%s"
+                % (_format_fitness(new_fn), _format_fitness(previous_fn or 0))
             )
         )
 
@@ -315,7 +963,7 @@ class ProgressLogger(Logger):
         self.pop_counter.count = 0
 
     def update_best(self, new_best, new_fn, *args):
-        self.total_counter.desc = "Best: %.3f" % new_fn
+        self.total_counter.desc = "Best: %s" % _format_fitness(new_fn)
 
     def end(self, *args):
         self.pop_counter.close()
@@ -341,17 +989,22 @@ class RichLogger(Logger):
         self.progress.advance(self.pop_counter)
         self.progress.advance(self.total_counter)
         self.console.rule("Evaluating pipeline")
-        self.console.print(repr(solution))
+        self.console.print(pretty_repr(solution))
 
     def eval_solution(self, solution, fitness):
-        self.console.print(Panel(f"📈 Fitness=[blue]{fitness:.3f}"))
+        self.console.print(Panel(f"📈 Fitness=[blue]{_format_fitness(fitness)}"))
+
+    def prune_solution(self, solution, fitness):
+        self.console.print(
+            f"✂️[yellow bold]Pruned:[/] partial fitness={_format_fitness(fitness)}"
+        )
 
     def error(self, e: Exception, solution):
         self.console.print(f"⚠️[red bold]Error:[/] {e}")
 
     def start_generation(self, generations, best_fn):
         self.console.rule(
-            f"New generation - Remaining={generations} - Best={best_fn or 0:.3f}"
+            f"New generation - Remaining={generations} - Best={_format_fitness(best_fn or 0)}"
         )
 
     def start_generation(self, generations, best_fn):
@@ -360,14 +1013,14 @@ class RichLogger(Logger):
     def update_best(self, new_best, new_fn, previous_best, previous_fn):
         self.console.print(
             Panel(
-                f"🔥 Best improved from [red bold]{previous_fn or 0:.3f}[/] to [green bold]{new_fn:.3f}[/]"
+                f"🔥 Best improved from [red bold]{_format_fitness(previous_fn or 0)}[/] to [green bold]{_format_fitness(new_fn)}[/]"
             )
         )
 
     def end(self, best, best_fn):
         self.console.rule(f"Search finished")
-        self.console.print(repr(best))
-        self.console.print(Panel(f"🌟 Best=[green bold]{best_fn or 0:.3f}"))
+        self.console.print(pretty_repr(best))
+        self.console.print(Panel(f"🌟 Best=[green bold]{_format_fitness(best_fn or 0)}"))
         self.progress.stop()
         self.console.rule("Search finished", style="red")
 
@@ -396,7 +1049,7 @@ class JsonLogger(Logger):
             .replace("\n", "")
             .replace(" ", "")
             .replace(",", ", "),
-            "multiline-pipeline": repr(solution),
+            "multiline-pipeline": pretty_repr(solution),
             "fitness": fitness,
         }
         self.update_log(eval_log)
@@ -408,7 +1061,7 @@ class JsonLogger(Logger):
             .replace("\n", "")
             .replace(" ", "")
             .replace(",", ", "),
-            "best-multiline-pipeline": repr(best),
+            "best-multiline-pipeline": pretty_repr(best),
             "best-fitness": best_fn,
         }
         self.update_log(eval_log)
@@ -424,6 +1077,141 @@ class JsonLogger(Logger):
             json.dump(new_data, log_file)
 
 
+class JsonLinesLogger(Logger):
+    """
+    Streams search events to a JSON-lines file, one record per line.
+
+    Unlike `JsonLogger`, the file is only appended to, so logging is linear in the
+    number of events and a killed search leaves a readable log (at most the last line
+    is truncated). Records are buffered and written every `flush_every` events or every
+    `flush_interval` seconds, whatever comes first, and when the search ends.
+
+    Every record has an `event` (`"begin"`, `"generation"`, `"eval"`, `"prune"`, `"error"`,
+    `"best"` or `"end"`) and a `time`. Evaluation records also hold the `pipeline`,
+    its `digest` (see `ReplaySampler.digest`), the `fitness` and the `duration`
+    in seconds since the pipeline was sampled. Use `read_json_lines` to load them.
+
+    ##### Examples
+
+    ```python
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "search.jsonl")
+    >>> logger = JsonLinesLogger(path, flush_every=2)
+    >>> logger.begin(generations=1, pop_size=2)
+    >>> for x in [1, 2]:
+    ...     logger.sample_solution(x)
+    ...     logger.eval_solution(x, fitness=x / 2)
+    >>> logger.end(2, 1.0)
+    >>> [r["fitness"] for r in read_json_lines(path, event="eval")]
+    [0.5, 1.0]
+
+    ```
+    """
+
+    def __init__(
+        self, path: str, flush_every: int = 100, flush_interval: float = 5.0
+    ) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._sampled = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def begin(self, generations, pop_size):
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+        self._write(event="begin", generations=generations, pop_size=pop_size)
+
+    def start_generation(self, generations, best_fn):
+        self._write(event="generation", remaining=generations, best_fn=best_fn)
+
+    def sample_solution(self, solution):
+        self._sampled[id(solution)] = time.time()
+
+    def eval_solution(self, solution, fitness):
+        self._write(event="eval", fitness=fitness, **self._describe(solution))
+
+    def prune_solution(self, solution, fitness):
+        self._write(event="prune", fitness=fitness, **self._describe(solution))
+
+    def error(self, e: Exception, solution):
+        self._write(event="error", error=str(e), **self._describe(solution))
+
+    def update_best(self, new_best, new_fn, previous_best, previous_fn):
+        self._write(event="best", fitness=new_fn, previous_fitness=previous_fn)
+
+    def end(self, best, best_fn):
+        self._write(event="end", pipeline=repr(best), fitness=best_fn)
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered records to the file.
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+
+            if records:
+                with open(self.path, "a") as fp:
+                    fp.write("".join(records))
+
+    def _describe(self, solution):
+        sampled = self._sampled.pop(id(solution), None)
+        sampler = getattr(solution, "sampler_", None)
+
+        return dict(
+            pipeline=repr(solution),
+            digest=sampler.digest() if isinstance(sampler, ReplaySampler) else None,
+            duration=None if sampled is None else time.time() - sampled,
+        )
+
+    def _write(self, **record):
+        record["time"] = time.time()
+        line = json.dumps(record, default=_json_default) + "\n"
+
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.flush_every
+
+        if full:
+            self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def _json_default(value):
+    # Numpy scalars and anything else that `json` doesn't know about
+    if hasattr(value, "item"):
+        return value.item()
+
+    return repr(value)
+
+
+def read_json_lines(path: str, event: str = None):
+    """
+    Lazily iterates over the records of a log written by `JsonLinesLogger`,
+    optionally only those of a given `event`.
+
+    A truncated last line (e.g., if the search was killed while writing) is skipped.
+    """
+    with open(path) as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if event is None or record.get("event") == event:
+                yield record
+
+
 class MemoryLogger(Logger):
     def __init__(self):
         self.generation_best_fn = [0]
@@ -441,6 +1229,74 @@ class MemoryLogger(Logger):
         self.generation_best_fn.append(self.generation_best_fn[-1])
 
 
+class ProfileLogger(Logger):
+    """
+    Aggregates the profiles of all the evaluated pipelines (see `StepProfile`), to find
+    which algorithms are to blame for a slow search. The fitness function must report
+    profiles, e.g., `AutoML(profile=True)`.
+
+    A summary table of the `top` slowest algorithms is printed when the search ends.
+
+    ##### Examples
+
+    ```python
+    >>> from autogoal.utils import StepProfile
+    >>> logger = ProfileLogger()
+    >>> logger.profile_solution(None, [
+    ...     StepProfile("Fast", "train", 0.1, 0.1, 0, 1024),
+    ...     StepProfile("Slow", "train", 2.0, 1.5, 2 ** 20, 1024),
+    ...     StepProfile("Slow", "eval", 1.0, 0.5, 0, 1024),
+    ... ])
+    >>> print(logger.summary())
+    Algorithm  Mode   Runs  Wall (s)  CPU (s)  Memory (MB)  Output (MB)
+    Slow       train     1      2.00     1.50         1.00         0.00
+    Slow       eval      1      1.00     0.50         0.00         0.00
+    Fast       train     1      0.10     0.10         0.00         0.00
+
+    ```
+    """
+
+    COLUMNS = ("Runs", "Wall (s)", "CPU (s)", "Memory (MB)", "Output (MB)")
+
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        self.stats = {}
+
+    def profile_solution(self, solution, profile):
+        for step in profile:
+            stats = self.stats.setdefault((step.algorithm, step.mode), [0, 0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += step.wall_time
+            stats[2] += step.cpu_time
+            # Peak memory is a maximum, output sizes an average
+            stats[3] = max(stats[3], step.memory)
+            stats[4] += (step.output_size - stats[4]) / stats[0]
+
+    def summary(self) -> str:
+        """
+        Returns a table of the algorithms with the most total wall time.
+        """
+        rows = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        rows = [
+            (name, mode, "%i" % runs, "%.2f" % wall, "%.2f" % cpu)
+            + ("%.2f" % (memory / 2 ** 20), "%.2f" % (output / 2 ** 20))
+            for (name, mode), (runs, wall, cpu, memory, output) in rows[: self.top]
+        ]
+        header = ("Algorithm", "Mode") + self.COLUMNS
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(7)]
+
+        return "\n".join(
+            "  ".join(
+                cell.ljust(width) if i < 2 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            ).rstrip()
+            for row in [header] + rows
+        )
+
+    def end(self, best, best_fn):
+        print(self.summary())
+
+
 class MultiLogger(Logger):
     def __init__(self, *loggers):
         self.loggers = loggers
@@ -467,6 +1323,12 @@ class MultiLogger(Logger):
     def eval_solution(self, *args, **kwargs):
         self.run("eval_solution", *args, **kwargs)
 
+    def prune_solution(self, *args, **kwargs):
+        self.run("prune_solution", *args, **kwargs)
+
+    def profile_solution(self, *args, **kwargs):
+        self.run("profile_solution", *args, **kwargs)
+
     def error(self, *args, **kwargs):
         self.run("error", *args, **kwargs)
 
@@ -0,0 +1,135 @@
+import math
+import threading
+
+import numpy as np
+
+from autogoal.search._learning import RidgeRegressor
+
+
+class CostModel:
+    """
+    Learns the expected evaluation time of a solution, to adapt its timeout.
+
+    The log of the evaluation time is regressed on the algorithms in the solution
+    (one-hot encoded by class name, taken from `solution.algorithms` when it is a `Pipeline`)
+    and the log of the data size (`data_size` times the evaluation budget, if any).
+
+    Once `min_samples` evaluations have been observed, the timeout of each evaluation
+    is `slack` times its predicted time, bounded by `min_timeout` and `max_timeout`.
+
+    ##### Examples
+
+    ```python
+    >>> class Fast: pass
+    >>> class Slow: pass
+    >>> model = CostModel(data_size=1000, min_samples=4, slack=2)
+    >>> for _ in range(2):
+    ...     model.observe(Fast(), 0.5)
+    ...     model.observe(Slow(), 8.0)
+    >>> model.timeout(Fast(), default=10) < 2 < model.timeout(Slow(), default=10)
+    True
+
+    ```
+    """
+
+    def __init__(
+        self,
+        data_size: int = None,
+        min_samples: int = 10,
+        slack: float = 3.0,
+        min_timeout: float = 1.0,
+        max_timeout: float = None,
+        estimator=None,
+    ):
+        self.data_size = data_size
+        self.min_samples = min_samples
+        self.slack = slack
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.estimator = estimator or RidgeRegressor(alpha=0.1)
+
+        self._vocabulary = {"size": 0}
+        self._features = []
+        self._times = []
+        self._fitted = None
+        self._lock = threading.Lock()
+
+    def observe(self, solution, elapsed: float, budget: float = None):
+        """
+        Records that evaluating `solution` took `elapsed` seconds.
+        """
+        with self._lock:
+            self._features.append(self._featurize(solution, budget))
+            self._times.append(math.log(max(elapsed, 1e-3)))
+            self._fitted = None
+
+    def predict(self, solution, budget: float = None):
+        """
+        Returns the expected evaluation time in seconds, or `None` if there are
+        not enough observations yet.
+        """
+        with self._lock:
+            if len(self._times) < self.min_samples:
+                return None
+
+            if self._fitted is None:
+                self.estimator.fit(self._matrix(self._features), self._times)
+                self._fitted = len(self._vocabulary)
+
+            # Algorithms never observed are unknown to the estimator
+            features = self._featurize(solution, budget)
+            X = self._matrix([features])[:, : self._fitted]
+
+            return math.exp(self.estimator.predict(X)[0])
+
+    def timeout(self, solution, default: float, budget: float = None) -> float:
+        """
+        Returns the wall-clock time allowed for evaluating `solution`.
+        """
+        expected = self.predict(solution, budget)
+
+        if expected is None:
+            return default
+
+        timeout = max(self.min_timeout, self.slack * expected)
+
+        if self.max_timeout:
+            timeout = min(timeout, self.max_timeout)
+
+        return timeout
+
+    def _get_state(self):
+        with self._lock:
+            return dict(
+                vocabulary=dict(self._vocabulary),
+                features=list(self._features),
+                times=list(self._times),
+            )
+
+    def _set_state(self, state):
+        with self._lock:
+            self._vocabulary = dict(state["vocabulary"])
+            self._features = list(state["features"])
+            self._times = list(state["times"])
+            self._fitted = None
+
+    def _featurize(self, solution, budget):
+        algorithms = getattr(solution, "algorithms", None) or [solution]
+        size = (self.data_size or 1) * (budget or 1)
+        features = {0: math.log(size)}
+
+        for algorithm in algorithms:
+            name = algorithm.__class__.__name__
+            column = self._vocabulary.setdefault(name, len(self._vocabulary))
+            features[column] = features.get(column, 0.0) + 1.0
+
+        return features
+
+    def _matrix(self, features):
+        X = np.zeros((len(features), len(self._vocabulary)))
+
+        for i, row in enumerate(features):
+            for column, value in row.items():
+                X[i, column] = value
+
+        return X
@@ -0,0 +1,282 @@
+import collections
+import itertools
+import os
+import pickle
+import threading
+import time
+
+from concurrent.futures import Executor, Future
+from multiprocessing.connection import Client, Listener
+
+import autogoal.logging
+from autogoal.sampling import ReplaySampler
+from autogoal.utils._process import _wrap_exception
+
+
+class _Task:
+    def __init__(self, id, future, history, kwargs):
+        self.id = id
+        self.future = future
+        self.history = history
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class SearchCoordinator(Executor):
+    """
+    Distributes the evaluation of candidates among remote `SearchWorker`s.
+
+    A `SearchCoordinator` is an executor that can be passed to any `SearchAlgorithm`
+    as `executor=`. Instead of running `fitness_fn` locally, each candidate is
+    serialized as its `ReplaySampler` history and queued. Workers, either local
+    processes or on other hosts, connect through a plain TCP channel, pull tasks one at a time,
+    rebuild the candidate by replaying the history against their own copy of the
+    same pipeline space, evaluate it, and push back the fitness and the time it took.
+
+    If a worker dies (or doesn't answer in `lease_timeout` seconds) while holding a task,
+    the task is queued again, at most `max_retries` times. A late answer for a task that was
+    queued again is ignored.
+
+    Messages are exchanged with `pickle`, hence anyone that can connect can run arbitrary
+    code in the coordinator (and in the workers). Only use it between trusted hosts, and keep the
+    `authkey` secret.
+
+    ##### Parameters
+
+    * `address`: `(host, port)` to listen on. A port `0` picks any free port, check `.address`.
+    * `authkey`: Shared secret that workers must present to connect. By default, a random one
+      is generated, check `.authkey`.
+    * `lease_timeout`: Maximum seconds a worker can hold a task, `None` means unbounded.
+    * `max_retries`: Times a task is re-queued before failing with `RuntimeError`.
+    """
+
+    def __init__(
+        self,
+        address=("localhost", 0),
+        authkey: bytes = None,
+        lease_timeout: float = None,
+        max_retries: int = 3,
+    ):
+        self.lease_timeout = lease_timeout
+        self.max_retries = max_retries
+        self.evaluation_times = []
+        self.authkey = authkey or os.urandom(32)
+
+        self._listener = Listener(address, authkey=self.authkey)
+        self._ids = itertools.count()
+        self._ready = collections.deque()
+        self._leases = {}
+        self._condition = threading.Condition()
+        self._shutdown = False
+
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def address(self):
+        return self._listener.address
+
+    def submit(self, fn, solution, **kwargs):
+        """
+        Queues the evaluation of `solution`.
+
+        `fn` is ignored, since workers evaluate with their own `fitness_fn`.
+        Extra keyword arguments (e.g., `budget` or `best_fitness`) are forwarded to it.
+        """
+        future = Future()
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit after shutdown.")
+
+            task = _Task(next(self._ids), future, solution.sampler_.dumps(), kwargs)
+            self._ready.append(task)
+            self._condition.notify()
+
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._condition:
+            self._shutdown = True
+
+            if cancel_futures:
+                for task in self._ready:
+                    task.future.cancel()
+
+                self._ready.clear()
+
+            self._condition.notify_all()
+
+        self._listener.close()
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                # Closed, or a client that failed to authenticate
+                if self._shutdown:
+                    return
+
+                continue
+
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _serve(self, connection):
+        task = None
+        attempt = None
+
+        try:
+            while True:
+                message = connection.recv()
+
+                if message[0] == "get":
+                    task = self._lease()
+
+                    if task is None:
+                        connection.send(("stop",))
+                        return
+
+                    attempt = task.attempts
+                    connection.send(("task", task.id, task.history, task.kwargs))
+
+                elif message[0] == "done":
+                    _, id, status, value, elapsed = message
+                    self._complete(id, status, value, elapsed, attempt)
+                    task = None
+
+        except (EOFError, OSError):
+            # The worker died in the middle of `task`
+            if task is not None:
+                self._release(task.id, "worker died", attempt)
+
+        finally:
+            connection.close()
+
+    def _lease(self):
+        with self._condition:
+            while True:
+                self._expire_leases()
+
+                while self._ready:
+                    task = self._ready.popleft()
+
+                    # Never started before, and the search no longer needs it
+                    if (
+                        task.attempts == 0
+                        and not task.future.set_running_or_notify_cancel()
+                    ):
+                        continue
+
+                    task.attempts += 1
+                    deadline = (
+                        time.time() + self.lease_timeout if self.lease_timeout else None
+                    )
+                    self._leases[task.id] = (task, deadline)
+                    return task
+
+                if self._shutdown:
+                    return None
+
+                self._condition.wait(timeout=self.lease_timeout or None)
+
+    def _expire_leases(self):
+        now = time.time()
+
+        for id, (task, deadline) in list(self._leases.items()):
+            if deadline is not None and deadline < now:
+                self._release(id, "lease timed out")
+
+    def _release(self, id, reason, attempt=None):
+        with self._condition:
+            task, _ = self._leases.get(id, (None, None))
+
+            # Already finished, or re-queued and leased again to another worker
+            if task is None or (attempt is not None and task.attempts != attempt):
+                return
+
+            del self._leases[id]
+
+            if task.attempts > self.max_retries:
+                task.future.set_exception(
+                    RuntimeError(
+                        "Evaluation failed after %i attempts, last one %s."
+                        % (task.attempts, reason)
+                    )
+                )
+                return
+
+            autogoal.logging.logger().warning(
+                "(!) Re-queuing task %i since %s." % (id, reason)
+            )
+            self._ready.appendleft(task)
+            self._condition.notify()
+
+    def _complete(self, id, status, value, elapsed, attempt):
+        with self._condition:
+            task, _ = self._leases.get(id, (None, None))
+
+            # A late answer for a task that was re-queued, and maybe leased to another worker
+            if task is None or task.attempts != attempt:
+                return
+
+            del self._leases[id]
+
+        if task.future.done():
+            return
+
+        self.evaluation_times.append(elapsed)
+
+        if status == "ok":
+            task.future.set_result(value)
+        else:
+            task.future.set_exception(value)
+
+
+class SearchWorker:
+    """
+    Evaluates candidates pulled from a `SearchCoordinator`.
+
+    `generator_fn` must be equivalent to the one used by the search in the coordinator
+    (e.g., the same `PipelineSpace`), since candidates are rebuilt by replaying their
+    sampling history against it. `run` returns when the coordinator shuts down.
+
+    `authkey` must be the one of the coordinator (see `SearchCoordinator.authkey`).
+    """
+
+    def __init__(self, generator_fn, fitness_fn, address, authkey: bytes):
+        self.generator_fn = generator_fn
+        self.fitness_fn = fitness_fn
+        self.address = address
+        self.authkey = authkey
+
+    def run(self):
+        with Client(self.address, authkey=self.authkey) as connection:
+            while True:
+                try:
+                    connection.send(("get",))
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                if message[0] == "stop":
+                    return
+
+                _, id, history, kwargs = message
+                start = time.time()
+                status, value = self._evaluate(history, kwargs)
+                elapsed = time.time() - start
+
+                try:
+                    connection.send(("done", id, status, value, elapsed))
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    error = RuntimeError("Cannot send back %r" % (value,))
+                    connection.send(("done", id, "error", error, elapsed))
+
+    def _evaluate(self, history, kwargs):
+        try:
+            solution = self.generator_fn(ReplaySampler.loads(history))
+            return "ok", self.fitness_fn(solution, **kwargs)
+        except Exception as e:
+            return "error", _wrap_exception(e)
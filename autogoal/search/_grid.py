@@ -0,0 +1,39 @@
+from ._base import SearchAlgorithm
+from autogoal.sampling import ExhaustiveSampler
+
+
+class GridSearch(SearchAlgorithm):
+    """
+    Enumerates all the solutions in the search space, without repetitions.
+
+    Solutions are generated by walking an `ExhaustiveSampler` through `generator_fn`
+    (which is hence required), and the search stops once the space is exhausted.
+    Continuous ranges, and discrete ones with more than `resolution` values,
+    are discretized into `resolution` evenly spaced values.
+    """
+
+    def __init__(self, *args, resolution: int = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if self._generator_fn is None:
+            raise ValueError("`GridSearch` requires a `generator_fn`.")
+
+        self._sampler = ExhaustiveSampler(resolution=resolution)
+
+    def _build_sampler(self):
+        return self._sampler
+
+    def _generate(self):
+        try:
+            return super()._generate()
+        finally:
+            self._sampler.finish()
+
+    def _exhausted(self):
+        return self._sampler.exhausted
+
+    def _get_state(self):
+        return dict(sampler=self._sampler)
+
+    def _set_state(self, state):
+        self._sampler = state["sampler"]
@@ -1,41 +1,164 @@
-from autogoal.search import SearchAlgorithm, ModelSampler
-from typing import Callable
+import math
 
+from numbers import Number
 
-class SurrogateFunction:
-    def __init__(self, func, learning_algorithm):
-        self.func = func
-        self.learning_algorithm = learning_algorithm
+import numpy as np
 
+from autogoal.search import PESearch
+
+
+class RidgeRegressor:
+    """
+    A minimal ridge regression with standardized features, used as the default
+    surrogate model of `SurrogateSearch`. Any object with `fit(X, y)` and
+    `predict(X)` methods (e.g., a `scikit-learn` regressor) can be used instead.
+
+    ##### Examples
+
+    ```python
+    >>> X = np.array([[0.0], [1.0], [2.0], [3.0]])
+    >>> model = RidgeRegressor(alpha=0.0).fit(X, 2 * X[:, 0] + 1)
+    >>> model.predict(np.array([[4.0]])).round(3)
+    array([9.])
+
+    ```
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        self.mean_ = X.mean(axis=0)
+        self.scale_ = X.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1
+        self.intercept_ = y.mean()
+
+        Z = (X - self.mean_) / self.scale_
+        A = Z.T @ Z + self.alpha * np.eye(Z.shape[1])
+        self.coef_ = np.linalg.lstsq(A, Z.T @ (y - self.intercept_), rcond=None)[0]
+        return self
+
+    def predict(self, X):
+        Z = (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+        return Z @ self.coef_ + self.intercept_
+
+
+class SurrogateSearch(PESearch):
+    """
+    A `PESearch` that pre-screens candidates with a learned fitness predictor.
+
+    Every evaluated candidate is featurized from its `ReplaySampler` history: categorical
+    decisions are one-hot encoded and numeric ones are used as is. Cache hits and pruned
+    evaluations are not learned from. After `initial_pop_size` evaluations, a cheap regressor (`estimator`, by default a `RidgeRegressor`) is fitted
+    on the (features, fitness) pairs collected so far. Then, for every slot in a generation,
+    `candidates` solutions are sampled from the probabilistic model and only the one with the
+    best predicted fitness is sent to the expensive `fitness_fn`. Candidates are sampled
+    in batches (by default of `candidates` each, see `BatchModelSampler`).
+    """
 
-class SurrogateSearch(SearchAlgorithm):
     def __init__(
         self,
-        base_search: Callable[[], SearchAlgorithm],
-        estimator,
-        generation_size: int = 10,
-        initial_pop_size: int = 10,
         *args,
+        estimator=None,
+        candidates: int = 10,
+        initial_pop_size: int = None,
         **kwargs
     ):
+        kwargs.setdefault("batch_size", candidates)
         super().__init__(*args, **kwargs)
 
-        self.base_search = base_search
-        self.generation_size = generation_size
-        self.initial_pop_size = initial_pop_size
+        self.estimator = estimator or RidgeRegressor()
+        self.candidates = candidates
+        self.initial_pop_size = initial_pop_size or self._pop_size
 
         self.training_X = []
         self.training_y = []
+        self._vocabulary = {}
+        self._fitted = None
 
-    def _start_generation(self):
-        pass
+    def _generate(self):
+        if len(self.training_y) < self.initial_pop_size:
+            return super()._generate()
 
-    def _finish_generation(self, fns):
-        pass
+        if self._fitted is None:
+            self.estimator.fit(self._matrix(self.training_X), self.training_y)
+            self._fitted = len(self._vocabulary)
 
-    def _build_sampler(self):
-        return ModelSampler()
+        # Every candidate adds its `ModelSampler`, only the selected one must stay,
+        # such that `_build_sampler` counts one sampler per slot.
+        start = len(self._samplers)
+        solutions = []
+        error = None
 
-    def _generate(self):
-        if len(self.training_X) < self.initial_pop_size:
-            return super()._generate()
+        for _ in range(self.candidates):
+            try:
+                solutions.append(super()._generate())
+            except Exception as e:
+                error = e
+
+        if not solutions:
+            del self._samplers[start:]
+            raise error
+
+        features = [self._featurize(solution.sampler_) for solution in solutions]
+        # Decisions never seen in training are unknown to the estimator
+        X = self._matrix(features)[:, : self._fitted]
+        predictions = self.estimator.predict(X)
+        maximize = self._maximize[0] if self._multi_objective else self._maximize
+        best = np.argmax(predictions) if maximize else np.argmin(predictions)
+
+        solution = solutions[best]
+        del self._samplers[start:]
+        self._samplers.append(solution.sampler_.sampler)
+
+        return solution
+
+    def _observe_evaluation(self, solution, fn, budget=None):
+        # With several objectives, only the first one is predicted
+        target = fn[0] if self._multi_objective else fn
+
+        # Low-fidelity evaluations would mislead the surrogate model
+        if math.isfinite(target) and (budget is None or budget >= 1):
+            self.training_X.append(self._featurize(solution.sampler_))
+            self.training_y.append(target)
+            self._fitted = None
+
+    def _get_state(self):
+        state = super()._get_state()
+        state["surrogate"] = (self.training_X, self.training_y, self._vocabulary)
+        return state
+
+    def _set_state(self, state):
+        super()._set_state(state)
+        self.training_X, self.training_y, self._vocabulary = state["surrogate"]
+        self._fitted = None
+
+    def _featurize(self, sampler):
+        features = {}
+
+        for method, signature, result in sampler.steps():
+            key = (method, signature)
+
+            # Options are recorded by index, which is categorical as well
+            if method in ("choice", "categorical") or not isinstance(result, Number):
+                key += (repr(result),)
+                value = 1.0
+            else:
+                value = float(result)
+
+            column = self._vocabulary.setdefault(key, len(self._vocabulary))
+            features[column] = features.get(column, 0.0) + value
+
+        return features
+
+    def _matrix(self, features):
+        X = np.zeros((len(features), len(self._vocabulary)))
+
+        for i, row in enumerate(features):
+            for column, value in row.items():
+                X[i, column] = value
+
+        return X
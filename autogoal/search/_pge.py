@@ -1,8 +1,17 @@
 import statistics
 import abc
+import collections
 
 from typing import Mapping, Optional, Dict, List, Sequence
-from autogoal.sampling import ModelSampler, best_indices, merge_updates, update_model
+from autogoal.sampling import (
+    BatchModelSampler,
+    ModelSampler,
+    best_indices,
+    merge_updates,
+    non_dominated_sort,
+    update_model,
+)
+from concurrent.futures import FIRST_COMPLETED, wait
 from ._base import SearchAlgorithm
 
 import random
@@ -21,14 +30,20 @@ class PESearch(SearchAlgorithm):
         random_state: Optional[int] = None,
         name: str = None,
         save: bool = False,
+        initial_model: Dict = None,
+        batch_size: int = None,
         **kwargs
     ):
         super().__init__(*args, **kwargs)
         self._learning_factor = learning_factor
         self._selection = selection
         self._epsilon_greed = epsilon_greed
-        self._model: Dict = {}
+        # A warm-start model, e.g., built by `LearnerMedia` from previous runs
+        self._model: Dict = dict(initial_model or {})
         self._random_states = random.Random(random_state)
+        # Candidates sampled together from the model, see `BatchModelSampler`
+        self._batch_size = batch_size
+        self._batch: List[ModelSampler] = []
         self._name = name or str(time.time())
         self._save = save
 
@@ -38,6 +53,8 @@ class PESearch(SearchAlgorithm):
     def _build_sampler(self):
         if len(self._samplers) < self._epsilon_greed * self._pop_size:
             sampler = ModelSampler(random_state=self._random_states.getrandbits(32))
+        elif self._batch_size:
+            sampler = self._next_in_batch()
         else:
             sampler = ModelSampler(
                 self._model, random_state=self._random_states.getrandbits(32)
@@ -46,12 +63,26 @@ class PESearch(SearchAlgorithm):
         self._samplers.append(sampler)
         return sampler
 
+    def _next_in_batch(self):
+        # A new batch is drawn when the current one is used up or the model changed
+        if not self._batch or self._batch[-1].model is not self._model:
+            batch = BatchModelSampler(
+                self._model,
+                k=self._batch_size,
+                random_state=self._random_states.getrandbits(32),
+            )
+            self._batch = batch.samplers()[::-1]
+
+        return self._batch.pop()
+
     def _finish_generation(self, fns):
         # Compute the marginal model of the best pipelines
-        indices = best_indices(
-            fns, k=int(self._selection * len(fns)), maximize=self._maximize
-        )
-        samplers: List[ModelSampler] = [self._samplers[i] for i in indices]
+        indices = self._select(fns, k=int(self._selection * len(fns)))
+        # Not every sampler built produced an evaluated candidate, hence they are
+        # taken from the evaluated solutions and not from `self._samplers`
+        samplers: List[ModelSampler] = [
+            self._evaluated[i].sampler_.sampler for i in indices
+        ]
         updates: Dict = merge_updates(*[sampler.updates for sampler in samplers])
 
         # Update the probabilistic model with the marginal model from the best pipelines
@@ -62,10 +93,157 @@ class PESearch(SearchAlgorithm):
             with open("model-" + self._name + ".pickle", "wb") as f:
                 pickle.dump(self._model, f)
 
+    def _select(self, fns, k):
+        if not self._multi_objective:
+            return best_indices(fns, k=k, maximize=self._maximize)
+
+        # Non-dominated ranking: whole fronts are selected until there are `k` indices
+        indices = []
+
+        for front in non_dominated_sort(fns, self._maximize):
+            indices.extend(front)
+
+            if len(indices) >= k:
+                break
+
+        return sorted(indices[:k])
+
+    def _get_state(self):
+        return dict(model=self._model, random_states=self._random_states.getstate())
+
+    def _set_state(self, state):
+        self._model = state["model"]
+        self._random_states.setstate(state["random_states"])
+
     def load(self, name_pickle_file):
         """Rewrites the probabilistic distribution of metaheuristic with the value of the name model.
         """
 
-        with open(name_pickle_file) as f:
+        with open(name_pickle_file, "rb") as f:
             loaded_obj = pickle.load(f)
         self._model = loaded_obj
+
+
+class AsyncPESearch(PESearch):
+    """
+    Steady-state variant of `PESearch` without generation barriers.
+
+    Instead of waiting for a whole generation before updating the probabilistic model,
+    up to `in_flight` evaluations (by default `n_jobs`) are kept running at all times.
+    Whenever one finishes, the model is updated from the best solutions in a sliding
+    window of the last `window_size` results (by default `pop_size`), and a new candidate
+    is sampled from the updated model to fill the free slot.
+
+    A "generation" is still `pop_size` finished evaluations, so `generations`,
+    `early_stop` and loggers keep their meaning. Since the model is updated after every
+    evaluation, each update uses `learning_factor / window_size` as the learning rate.
+    Multi-fidelity evaluation (`min_budget`) is not supported, since there are no generations
+    to build brackets from.
+    """
+
+    def __init__(
+        self, *args, in_flight: int = None, window_size: int = None, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+
+        if self._min_budget is not None:
+            raise ValueError("Multi-fidelity evaluation requires a generational search.")
+        self._in_flight = in_flight or max(1, self._n_jobs)
+        self._window = collections.deque(maxlen=window_size or self._pop_size)
+        self._pending = {}
+
+    def _start_generation(self):
+        # Samplers are tracked per solution, there is no generation to reset.
+        pass
+
+    def _build_sampler(self):
+        if self._random_states.random() < self._epsilon_greed:
+            model = None
+        else:
+            model = self._model
+
+        return ModelSampler(model, random_state=self._random_states.getrandbits(32))
+
+    def _run_generation(self, logger, seen, executor):
+        finished = 0
+
+        while finished < self._pop_size:
+            # Keep all the slots busy, sampling from the most recent model.
+            while len(self._pending) < self._in_flight and finished < self._pop_size:
+                solution = self._sample_solution(logger, seen)
+
+                if solution is None:
+                    finished += 1
+                    continue
+
+                logger.sample_solution(solution)
+                fn = self._cached_fitness(solution)
+
+                if fn is None and executor is None:
+                    fn = self._evaluate_solution(
+                        lambda: self._call_fitness(solution, **self._fitness_kwargs()),
+                        solution,
+                        logger,
+                    )
+
+                if fn is not None:
+                    self._update_window(solution, fn)
+                    yield finished, solution, fn
+                    finished += 1
+                    continue
+
+                future = executor.submit(
+                    self._call_fitness, solution, **self._fitness_kwargs()
+                )
+                self._pending[future] = solution
+
+            if not self._pending:
+                continue
+
+            done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                # Extra results are left pending and count for the next generation
+                if finished >= self._pop_size:
+                    break
+
+                solution = self._pending.pop(future)
+                fn = self._evaluate_solution(future.result, solution, logger)
+                self._update_window(solution, fn)
+                yield finished, solution, fn
+                finished += 1
+
+    def _update_window(self, solution, fn):
+        self._window.append((fn, solution.sampler_.sampler))
+
+        fns = [fn for fn, _ in self._window]
+        indices = self._select(fns, k=max(1, int(self._selection * len(fns))))
+        updates: Dict = merge_updates(*[self._window[i][1].updates for i in indices])
+
+        self._model = update_model(
+            self._model, updates, self._learning_factor / self._window.maxlen
+        )
+
+    def _finish_generation(self, fns):
+        # The model is updated incrementally, only the saving is done per generation.
+        if self._save == True:
+            with open("model-" + self._name + ".pickle", "wb") as f:
+                pickle.dump(self._model, f)
+
+    def _get_state(self):
+        state = super()._get_state()
+        state["window"] = list(self._window)
+        return state
+
+    def _set_state(self, state):
+        super()._set_state(state)
+        self._window.clear()
+        self._window.extend(state["window"])
+
+    def _stop_executor(self, executor):
+        # Evaluations still running when the search stops are abandoned.
+        for future in self._pending:
+            future.cancel()
+
+        self._pending = {}
+        super()._stop_executor(executor)
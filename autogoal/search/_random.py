@@ -11,3 +11,9 @@ class RandomSearch(SearchAlgorithm):
 
     def _build_sampler(self):
         return self._sampler
+
+    def _get_state(self):
+        return dict(random_state=self._sampler.rand.getstate())
+
+    def _set_state(self, state):
+        self._sampler.rand.setstate(state["random_state"])
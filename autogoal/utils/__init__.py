@@ -1,6 +1,7 @@
 import enum
 import inspect
 import collections
+import functools
 
 
 MAX_REPR_DEPTH = 10
@@ -35,11 +36,13 @@ def nice_repr(cls):
     ...
     >>> x = MyType(42, b='hello', c='world')
     >>> x
-    MyType(a=42, b="hello")
+    MyType(a=42, b='hello')
 
     ```
 
     It works nicely with nested objects, if all of them are `@nice_repr` decorated.
+    The `repr` is kept in a single line, since it is computed often (e.g., to detect
+    repeated solutions), use `pretty_repr` to format it for humans.
 
     ```python
     >>> @nice_repr
@@ -50,7 +53,9 @@ def nice_repr(cls):
     ... class B:
     ...     def __init__(self, value):
     ...         self.value = value
-    >>> A([B(i) for i in range(10)])
+    >>> A([B(i) for i in range(3)])
+    A(inner=[B(value=0), B(value=1), B(value=2)])
+    >>> print(pretty_repr(A([B(i) for i in range(10)])))
     A(
         inner=[
             B(value=0),
@@ -86,42 +91,115 @@ def nice_repr(cls):
     """
 
     def repr_method(self):
-        init_signature = inspect.signature(self.__init__)
-        exclude_param_names = set(["self"])
-
         if _repr_depth[0] > MAX_REPR_DEPTH:
             return f"{self.__class__.__name__}(...)"
 
         _repr_depth[0] += 1
 
-        parameter_names = [
-            name
-            for name in init_signature.parameters
-            if name not in exclude_param_names
+        try:
+            args = ", ".join(
+                f"{name}={repr(value)}"
+                for name, value in zip(*_nice_repr_parameters(self))
+                if value is not None
+            )
+        finally:
+            _repr_depth[0] -= 1
+
+        return f"{self.__class__.__name__}({args})"
+
+    cls.__repr__ = repr_method
+    cls.__nice_repr__ = True
+    return cls
+
+
+_signatures = {}
+
+
+def _nice_repr_parameters(obj):
+    # Inspecting the signature is slow, and it only depends on the class
+    cls = type(obj)
+    names = _signatures.get(cls)
+
+    if names is None:
+        names = _signatures[cls] = [
+            name for name in inspect.signature(obj.__init__).parameters if name != "self"
         ]
-        parameter_values = [getattr(self, param, None) for param in parameter_names]
 
-        if hasattr(self, "__nice_repr_hook__"):
-            self.__nice_repr_hook__(parameter_names, parameter_values)
+    values = [getattr(obj, name, None) for name in names]
 
-        args = ", ".join(
-            f"{name}={repr(value)}"
-            for name, value in zip(parameter_names, parameter_values)
-            if value is not None
-        )
-        fr = f"{self.__class__.__name__}({args})"
+    if hasattr(obj, "__nice_repr_hook__"):
+        names = list(names)
+        obj.__nice_repr_hook__(names, values)
 
-        _repr_depth[0] -= 1
+    return names, values
 
-        try:
-            import black
 
-            return black.format_str(fr, mode=black.FileMode()).strip()
-        except:
-            return fr
+@functools.lru_cache(maxsize=1024)
+def _format(text):
+    try:
+        import black
 
-    cls.__repr__ = repr_method
-    return cls
+        return black.format_str(text, mode=black.FileMode()).strip()
+    except:
+        return text
+
+
+def pretty_repr(obj) -> str:
+    """
+    Returns the `repr` of `obj` formatted with `black` (if installed), for human-facing output.
+    """
+    return _format(repr(obj))
+
+
+def structural_key(obj, depth: int = 0):
+    """
+    Returns a hashable key that identifies the structure of `obj`, i.e., two objects have
+    the same key if they have the same `repr`, but it's cheaper to compute.
+
+    ##### Examples
+
+    ```python
+    >>> @nice_repr
+    ... class A:
+    ...     def __init__(self, x, y=None):
+    ...         self.x = x
+    ...         self.y = y
+    >>> structural_key(A([1, 2])) == structural_key(A([1, 2]))
+    True
+    >>> structural_key(A([1, 2])) == structural_key(A([1, 3]))
+    False
+    >>> structural_key(A(1)) == structural_key(A(1.0))
+    False
+    >>> structural_key(A(1)) == structural_key(A(True))
+    False
+
+    ```
+    """
+    cls = type(obj)
+
+    # Typed, since e.g. `1`, `1.0` and `True` are equal but have different `repr`
+    if cls in _ATOMS:
+        return (cls, obj)
+
+    if depth > MAX_REPR_DEPTH:
+        return ...
+
+    if getattr(cls, "__nice_repr__", False):
+        key = [cls.__name__]
+
+        for name, value in zip(*_nice_repr_parameters(obj)):
+            if value is not None:
+                key.append((name, structural_key(value, depth + 1)))
+
+        return tuple(key)
+
+    if cls is list or cls is tuple:
+        return (cls.__name__, *[structural_key(value, depth + 1) for value in obj])
+
+    return repr(obj)
+
+
+_ATOMS = {str, int, float, bool, type(None)}
 
 
 Kb = 1024
@@ -178,8 +256,10 @@ def factory(func_or_type, *args, **kwargs):
 
 
 from ._resource import ResourceManager
-from ._process import RestrictedWorker, RestrictedWorkerByJoin
-from ._cache import CacheManager
+from ._process import RestrictedWorker, RestrictedWorkerByJoin, RestrictedWorkerPool
+from ._cache import CacheManager, FitnessCache, StepCache, dataset_fingerprint
+from ._profile import EvaluationResult, MemoryMonitor, StepProfile
+from ._shared import SharedData, SharedStringList
 from ._storage import AlgorithmConfig, inspect_storage, generate_production_dockerfile
 from ._dependency_resolver import get_contrib, generate_installer
 from ._server import run
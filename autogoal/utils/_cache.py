@@ -1,5 +1,10 @@
 import mmap
 import functools
+import hashlib
+import sys
+import threading
+
+from collections import OrderedDict
 
 
 import pickle, json, csv, os, shutil
@@ -84,6 +89,221 @@ class PersistentDict(dict):
 from pathlib import Path
 
 
+class FitnessCache:
+    """
+    A size-bounded cache of fitness values, optionally persisted on disk.
+
+    Keys are canonical identifiers of sampled configurations, e.g., `ReplaySampler.digest()`.
+    All keys are prefixed with a `namespace` that should identify the dataset and the
+    evaluation protocol, such that the same file can be safely shared among different problems.
+    When the cache holds more than `max_size` entries, the least recently used are evicted.
+
+    ##### Examples
+
+    ```python
+    >>> cache = FitnessCache(max_size=2)
+    >>> cache.put("a", 0.5)
+    >>> cache.put("b", 0.7)
+    >>> cache.get("a")
+    0.5
+    >>> cache.put("c", 0.9)
+    >>> cache.get("b") is None
+    True
+    >>> len(cache)
+    2
+
+    ```
+    """
+
+    def __init__(self, path: str = None, max_size: int = 10000, namespace: str = ""):
+        self.path = path
+        self.max_size = max_size
+        self.namespace = namespace
+        self._data = PersistentDict(str(path)) if path is not None else {}
+
+    def get(self, key: str, default=None):
+        key = self._key(key)
+
+        try:
+            # Re-insert to mark as the most recently used
+            value = self._data.pop(key)
+            self._data[key] = value
+            return value
+        except KeyError:
+            return default
+
+    def put(self, key: str, fitness) -> None:
+        key = self._key(key)
+        self._data.pop(key, None)
+        self._data[key] = fitness
+
+        while len(self._data) > self.max_size:
+            del self._data[next(iter(self._data))]
+
+    def sync(self) -> None:
+        """
+        Writes the cache to disk, if it has a path.
+        """
+        if self.path is not None:
+            self._data.sync()
+
+    def items(self):
+        """
+        Returns the `(key, fitness)` pairs stored in the cache, including the namespace.
+        """
+        return self._data.items()
+
+    def update(self, items) -> None:
+        """
+        Restores `(key, fitness)` pairs obtained from `items`.
+        """
+        for key, fitness in items:
+            self._data.pop(key, None)
+            self._data[key] = fitness
+
+    def __contains__(self, key: str) -> bool:
+        return self._key(key) in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+
+def dataset_fingerprint(*values) -> str:
+    """
+    Computes a hash that identifies the content of one or more datasets.
+
+    Supports `numpy` arrays, `scipy` sparse matrices, and any picklable value.
+
+    ##### Examples
+
+    ```python
+    >>> import numpy as np
+    >>> X = np.ones((3, 2))
+    >>> dataset_fingerprint(X, [1, 2, 3]) == dataset_fingerprint(X.copy(), [1, 2, 3])
+    True
+    >>> dataset_fingerprint(X, [1, 2, 3]) == dataset_fingerprint(X, [1, 2, 4])
+    False
+
+    ```
+    """
+    import numpy as np
+    from scipy.sparse import issparse
+    from autogoal.utils._shared import SharedData
+
+    h = hashlib.sha1()
+
+    for value in values:
+        if isinstance(value, SharedData):
+            value = value.value
+
+        if issparse(value):
+            value = value.tocsr()
+            h.update(repr(("sparse", value.shape)).encode("utf8"))
+            arrays = [value.data, value.indices, value.indptr]
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            h.update(repr(("dense", value.shape, value.dtype.str)).encode("utf8"))
+            arrays = [value]
+        else:
+            h.update(pickle.dumps(value))
+            arrays = []
+
+        for array in arrays:
+            h.update(memoryview(np.ascontiguousarray(array)).cast("B"))
+
+    return h.hexdigest()
+
+
+class StepCache:
+    """
+    A memory-bounded LRU cache of the outputs of pipeline steps.
+
+    Entries are keyed by tuples that identify the input data (e.g., the fold), the algorithm
+    class and hyperparameters, and the key of the upstream step, such that pipelines
+    that share a prefix reuse the already computed intermediate values (see `Pipeline.run`).
+    When the estimated size of the stored values exceeds `max_memory` bytes,
+    the least recently used entries are evicted.
+
+    ##### Examples
+
+    ```python
+    >>> import numpy as np
+    >>> cache = StepCache(max_memory=1000)
+    >>> cache.put("a", np.zeros(100))
+    >>> cache.put("b", np.zeros(100))
+    >>> cache.get("a") is None
+    True
+    >>> cache.get("b").shape
+    (100,)
+    >>> cache.memory
+    800
+
+    ```
+    """
+
+    def __init__(self, max_memory: int = 1024 ** 3):
+        self.max_memory = max_memory
+        self.memory = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value) -> None:
+        size = _sizeof(value)
+
+        # Never evict everything else for a value that can't fit anyway
+        if size > self.max_memory:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.memory -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self.memory += size
+
+            while self.memory > self.max_memory:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.memory -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.memory = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _sizeof(value) -> int:
+    # A cheap estimation, good enough for arrays and sparse matrices that dominate the cache
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+
+    if all(hasattr(value, attr) for attr in ("data", "indices", "indptr")):
+        return sum(_sizeof(getattr(value, attr)) for attr in ("data", "indices", "indptr"))
+
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_sizeof(item) for item in value)
+
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(item) for item in value.values())
+
+    return sys.getsizeof(value)
+
+
 class CacheManager:
     _instance = None
 
@@ -1,5 +1,7 @@
 from logging import log
 import multiprocessing
+import queue
+import threading
 import warnings
 import psutil
 import signal
@@ -8,6 +10,8 @@ import traceback
 import logging
 import platform
 
+from concurrent.futures import Future
+
 if platform.system() == "Linux":
     import resource
 
@@ -47,8 +51,7 @@ class RestrictedWorker:
             result = self.function(*args, **kwargs)
             result_bucket["result"] = result
         except Exception as e:
-            msg = "{}\n\nOriginal {}".format(e, traceback.format_exc())
-            result_bucket["result"] = e.__class__(msg)
+            result_bucket["result"] = _wrap_exception(e)
 
     def run_restricted(self, *args, **kwargs):
         """
@@ -97,7 +100,7 @@ class RestrictedWorkerByJoin(RestrictedWorker):
             _, mhard = resource.getrlimit(resource.RLIMIT_AS)
             used_memory = self.get_used_memory()
 
-            if self.memory is None:
+            if not self.memory:
                 return
 
             if self.memory > (used_memory + 50 * Mb):
@@ -115,6 +118,36 @@ class RestrictedWorkerByJoin(RestrictedWorker):
         Executes a given function with restricted amount of
         CPU time and RAM memory usage
         """
+        return self.run_with_timeout(self.timeout or None, *args, **kwargs)
+
+    def run_with_timeout(self, timeout, *args, **kwargs):
+        """
+        Same as `run_restricted` but overriding the wall-clock `timeout` for this call only.
+        A `timeout` of `None` means no limit, while `0` expires right away.
+        """
+        return self._collect(self._start(args, kwargs), timeout)
+
+    def submit_with_timeout(self, timeout, *args, **kwargs) -> Future:
+        """
+        Same as `run_with_timeout` but returns a `Future` immediately.
+
+        The process is started from the calling thread and only waited for in
+        the background, so children are never forked from helper threads.
+        """
+        task = self._start(args, kwargs)
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def wait():
+            try:
+                future.set_result(self._collect(task, timeout))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=wait, daemon=True).start()
+        return future
+
+    def _start(self, args, kwargs):
         manager = multiprocessing.Manager()
         result_bucket = manager.dict()
 
@@ -123,15 +156,222 @@ class RestrictedWorkerByJoin(RestrictedWorker):
         )
 
         rprocess.start()
-        rprocess.join(self.timeout)
+        return manager, rprocess, result_bucket
+
+    def _collect(self, task, timeout):
+        manager, rprocess, result_bucket = task
 
-        if rprocess.exitcode == 0:
-            result = result_bucket["result"]
-        else:
-            rprocess.terminate()
-            raise TimeoutError()
+        try:
+            rprocess.join(None if timeout is None else max(0, timeout))
+
+            if rprocess.exitcode == 0:
+                result = result_bucket["result"]
+            else:
+                rprocess.terminate()
+                rprocess.join()
+                raise TimeoutError()
+        finally:
+            manager.shutdown()
 
         if isinstance(result, Exception):  # Exception ocurred
             raise result
 
         return result
+
+
+class RestrictedWorkerPool(RestrictedWorkerByJoin):
+    """
+    Executes a function in a pool of long-lived restricted processes.
+
+    Unlike `RestrictedWorkerByJoin`, which spawns a new process (and a `Manager`
+    server) for every call, worker processes are started lazily and reused across
+    calls, so the function (and everything it closes over) is sent to each worker
+    only once. Each call is still bound by the wall-clock `timeout`, and the
+    worker's heap is bound by `RLIMIT_DATA` on Linux.
+
+    A worker is recycled after it exceeds the timeout, raises a `MemoryError`,
+    dies unexpectedly, or has completed `max_tasks` calls.
+
+    ##### Parameters
+
+    - `function`: the callable to execute.
+    - `timeout: int`: maximum wall-clock seconds per call, or `None` for no limit.
+    - `memory: int`: maximum heap size in bytes of each worker, or `None` for no limit.
+    - `size: int`: maximum number of concurrent workers (default = `1`).
+    - `max_tasks: int`: number of calls after which a worker is replaced (default = `100`).
+
+    ##### Notes
+
+    - Calls are thread-safe, at most `size` of them run concurrently.
+    - Call `shutdown()` to stop all workers, the pool restarts them on demand.
+    """
+
+    def __init__(
+        self, function, timeout: int, memory: int, size: int = 1, max_tasks: int = 100
+    ):
+        super().__init__(function, timeout, memory)
+        self.size = size
+        self.max_tasks = max_tasks
+        self._idle = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._workers = set()
+
+    def __getstate__(self):
+        # Only the restriction parameters travel to the worker processes
+        state = dict(self.__dict__)
+
+        for key in ["_idle", "_slots", "_lock", "_workers"]:
+            state.pop(key)
+
+        return state
+
+    def _start(self, args, kwargs):
+        self._slots.acquire()
+
+        try:
+            worker = self._acquire_worker()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        try:
+            worker.connection.send((args, kwargs))
+        except (EOFError, OSError):
+            # The worker died, which `_collect` finds out when reading the result
+            pass
+
+        return worker
+
+    def _collect(self, worker, timeout):
+        try:
+            try:
+                finished = worker.connection.poll(
+                    None if timeout is None else max(0, timeout)
+                )
+                status, result = worker.connection.recv() if finished else (None, None)
+            except (EOFError, OSError):
+                # The worker died, most likely killed by the OS
+                finished, status = True, None
+
+            if not finished or status is None:
+                self._discard_worker(worker, force=True)
+                raise TimeoutError()
+
+            worker.tasks += 1
+
+            if isinstance(result, MemoryError) or worker.tasks >= self.max_tasks:
+                self._discard_worker(worker)
+            else:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+        if status == "error":
+            raise result
+
+        return result
+
+    def shutdown(self):
+        """
+        Stops all the workers in the pool.
+        """
+        with self._lock:
+            workers = list(self._workers)
+
+        for worker in workers:
+            self._discard_worker(worker)
+
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+    def _acquire_worker(self) -> "_PoolWorker":
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=self._worker_loop, args=[child_conn], daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _PoolWorker(process, parent_conn)
+
+        with self._lock:
+            self._workers.add(worker)
+
+        return worker
+
+    def _discard_worker(self, worker: "_PoolWorker", force=False):
+        with self._lock:
+            self._workers.discard(worker)
+
+        if not force:
+            try:
+                worker.connection.send(None)
+                worker.process.join(1)
+            except (EOFError, OSError):
+                pass
+
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join()
+
+        worker.connection.close()
+
+    def _worker_loop(self, connection):
+        try:
+            self._restrict()
+            restrict_error = None
+        except Exception as e:
+            restrict_error = _wrap_exception(e)
+
+        while True:
+            try:
+                task = connection.recv()
+            except EOFError:
+                break
+
+            if task is None:
+                break
+
+            if restrict_error is not None:
+                connection.send(("error", restrict_error))
+                continue
+
+            args, kwargs = task
+
+            try:
+                connection.send(("ok", self.function(*args, **kwargs)))
+            except Exception as e:
+                connection.send(("error", _wrap_exception(e)))
+
+                if isinstance(e, MemoryError):
+                    break
+
+        connection.close()
+
+
+class _PoolWorker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.tasks = 0
+
+
+def _wrap_exception(e: Exception) -> Exception:
+    from autogoal.exceptions import PrunedEvaluation
+
+    # Not an actual error, the search needs it unchanged
+    if isinstance(e, PrunedEvaluation):
+        return e
+
+    msg = "{}\n\nOriginal {}".format(e, traceback.format_exc())
+
+    try:
+        return e.__class__(msg)
+    except Exception:
+        return e
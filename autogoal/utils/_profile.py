@@ -0,0 +1,137 @@
+import collections
+import threading
+import time
+import weakref
+
+import psutil
+
+from ._cache import _sizeof
+
+
+class MemoryMonitor:
+    """
+    Measures how much the resident memory of the current process grows over a period.
+
+    The high-water mark of the process (`ru_maxrss`) only grows, so a process that
+    already peaked (e.g., a reused worker) would report no growth at all. Instead,
+    the resident memory is sampled every `interval` seconds in a background thread,
+    from `start()` until `stop()`. Peaks shorter than `interval` may be missed.
+
+    ##### Examples
+
+    ```python
+    >>> monitor = MemoryMonitor().start()
+    >>> data = b"x" * 2 ** 26
+    >>> monitor.stop() > 2 ** 25
+    True
+
+    ```
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.growth = 0
+
+    def start(self) -> "MemoryMonitor":
+        process = psutil.Process()
+        self._start = process.memory_info().rss
+        # Shared with the sampling thread, which must not keep the monitor alive
+        self._peak = [self._start]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=_sample_memory,
+            args=(process, self._peak, self._stop, self.interval),
+            daemon=True,
+        )
+        self._thread.start()
+
+        # The thread is stopped anyway if the measured code raises before `stop()`
+        weakref.finalize(self, self._stop.set)
+        return self
+
+    def stop(self) -> int:
+        """
+        Stops sampling and returns the growth (in bytes) of the resident memory.
+        """
+        self._stop.set()
+        self._thread.join()
+
+        peak = max(self._peak[0], psutil.Process().memory_info().rss)
+        self.growth = max(0, peak - self._start)
+        return self.growth
+
+
+def _sample_memory(process, peak, stop, interval):
+    while not stop.wait(interval):
+        peak[0] = max(peak[0], process.memory_info().rss)
+
+
+class StepProfile(
+    collections.namedtuple(
+        "StepProfile",
+        ["algorithm", "mode", "wall_time", "cpu_time", "memory", "output_size"],
+    )
+):
+    """
+    Resources used by one step of a pipeline in one run, as recorded by `Pipeline.run(profile=...)`.
+
+    * `algorithm`: Class name of the algorithm.
+    * `mode`: Either `"train"` or `"eval"`.
+    * `wall_time` and `cpu_time`: Seconds spent in the step.
+    * `memory`: Growth (in bytes) of the resident memory of the process during the step
+      (see `MemoryMonitor`).
+    * `output_size`: Estimated size (in bytes) of the output of the step.
+
+    ##### Examples
+
+    ```python
+    >>> start = StepProfile.start()
+    >>> output = [0] * 1000
+    >>> profile = StepProfile.measure(object(), "train", start, output)
+    >>> profile.algorithm, profile.mode, profile.wall_time >= 0
+    ('object', 'train', True)
+
+    ```
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def start():
+        """
+        Returns the counters to pass to `measure` once the step finishes.
+        """
+        return time.perf_counter(), time.process_time(), MemoryMonitor().start()
+
+    @staticmethod
+    def measure(algorithm, mode: str, start, output) -> "StepProfile":
+        wall_time, cpu_time, memory = start
+
+        return StepProfile(
+            algorithm=algorithm.__class__.__name__,
+            mode=mode,
+            wall_time=time.perf_counter() - wall_time,
+            cpu_time=time.process_time() - cpu_time,
+            memory=memory.stop(),
+            output_size=_sizeof(output),
+        )
+
+
+class EvaluationResult:
+    """
+    A fitness value along with the profile (a list of `StepProfile`) of the evaluation
+    that computed it.
+
+    Fitness functions may return it instead of a plain fitness. Searches then report
+    the `profile` to loggers (see `Logger.profile_solution`) and only keep the `fitness`.
+    """
+
+    def __init__(self, fitness, profile):
+        self.fitness = fitness
+        self.profile = profile
+
+    def __repr__(self):
+        return "EvaluationResult(fitness=%r, steps=%i)" % (
+            self.fitness,
+            len(self.profile),
+        )
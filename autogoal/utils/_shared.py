@@ -0,0 +1,226 @@
+import numpy as np
+
+from collections.abc import Sequence
+from scipy.sparse import csr_matrix, issparse
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # Python < 3.8, every value travels to the workers as usual
+    SharedMemory = None
+
+
+class SharedData:
+    """
+    Places a value once in shared memory so that worker processes can attach
+    read-only views of it instead of receiving a copy.
+
+    Supported values are dense `numpy` arrays, `scipy` CSR matrices (each of the
+    `data`, `indices` and `indptr` buffers is shared) and lists of strings.
+    Any other value (or every value, in Python < 3.8) is kept as is and travels to the
+    workers as usual.
+
+    Instances are cheap to pickle: only the names of the shared segments are serialized.
+    The process that creates the instance owns the segments and must call `close()`
+    when done, which releases the shared memory.
+
+    ##### Examples
+
+    ```python
+    >>> import numpy as np
+    >>> from pickle import loads, dumps
+    >>> shared = SharedData(np.arange(6).reshape(2, 3))
+    >>> view = loads(dumps(shared)).value
+    >>> view
+    array([[0, 1, 2],
+           [3, 4, 5]])
+    >>> view.flags.writeable
+    False
+
+    ```
+
+    Lists of strings are shared as a single UTF-8 buffer and exposed as a sequence:
+
+    ```python
+    >>> texts = SharedData(["hello", "world", "¡hola!"])
+    >>> texts.value[2]
+    '¡hola!'
+    >>> texts.value[[0, 1]]
+    ['hello', 'world']
+    >>> shared.close()
+    >>> texts.close()
+
+    ```
+    """
+
+    def __init__(self, value):
+        self._segments = []
+        self._value = None
+
+        if SharedMemory is None:
+            self._kind = "plain"
+            self._meta = value
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            self._kind = "dense"
+            self._meta = self._place(value)
+        elif issparse(value) and value.format == "csr":
+            self._kind = "csr"
+            self._meta = (
+                value.shape,
+                self._place(value.data),
+                self._place(value.indices),
+                self._place(value.indptr),
+            )
+        elif (
+            isinstance(value, list)
+            and len(value) > 0
+            and all(isinstance(x, str) for x in value)
+        ):
+            self._kind = "strings"
+            encoded = [x.encode("utf8") for x in value]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(x) for x in encoded], out=offsets[1:])
+            self._meta = (
+                self._place(np.frombuffer(b"".join(encoded), dtype=np.uint8)),
+                self._place(offsets),
+            )
+        else:
+            self._kind = "plain"
+            self._meta = value
+
+    @property
+    def value(self):
+        """
+        Returns the (read-only) shared value, attaching to the shared segments if necessary.
+        """
+        if self._value is None:
+            self._value = self._build()
+
+        return self._value
+
+    def close(self):
+        """
+        Releases the shared segments. Only has effect on the owner instance.
+        """
+        self._value = None
+
+        for shm in self._segments:
+            try:
+                shm.close()
+            except BufferError:
+                # Some views are still alive, the memory is unmapped when they die
+                pass
+
+            shm.unlink()
+
+        self._segments = []
+
+    def __getstate__(self):
+        return dict(kind=self._kind, meta=self._meta)
+
+    def __setstate__(self, state):
+        self._segments = []
+        self._value = None
+        self._kind = state["kind"]
+        self._meta = state["meta"]
+
+    def _place(self, array: np.ndarray):
+        # Shared memory segments cannot be empty
+        shm = SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        self._segments.append(shm)
+        return (shm.name, array.shape, array.dtype.str)
+
+    def _attach(self, meta) -> np.ndarray:
+        name, shape, dtype = meta
+        shm = self._find_segment(name)
+
+        if shm is None:
+            shm = _attach_segment(name)
+
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        return array
+
+    def _find_segment(self, name):
+        for shm in self._segments:
+            if shm.name == name:
+                return shm
+
+        return None
+
+    def _build(self):
+        if self._kind == "dense":
+            return self._attach(self._meta)
+
+        if self._kind == "csr":
+            shape, data, indices, indptr = self._meta
+            return csr_matrix(
+                (self._attach(data), self._attach(indices), self._attach(indptr)),
+                shape=shape,
+                copy=False,
+            )
+
+        if self._kind == "strings":
+            buffer, offsets = self._meta
+            return SharedStringList(self._attach(buffer), self._attach(offsets))
+
+        return self._meta
+
+
+# Segments attached by non-owner instances stay mapped for the lifetime of the
+# process, since views handed out by `SharedData.value` may outlive the instance.
+_ATTACHED_SEGMENTS = {}
+
+
+def _attach_segment(name) -> SharedMemory:
+    try:
+        return _ATTACHED_SEGMENTS[name]
+    except KeyError:
+        pass
+
+    try:
+        # Only the owner process must release the segment (Python 3.13+)
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:
+        # Processes started by `multiprocessing` share the owner's resource tracker,
+        # so registering the segment again is harmless.
+        shm = SharedMemory(name=name)
+
+    _ATTACHED_SEGMENTS[name] = shm
+    return shm
+
+
+class SharedStringList(Sequence):
+    """
+    A read-only list of strings backed by a single UTF-8 buffer and an array of offsets.
+
+    Besides integers and slices, it can be indexed with a list or array of indices,
+    which returns a regular `list` of strings.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self._buffer = buffer
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if isinstance(index, (list, tuple, np.ndarray)):
+            return [self[int(i)] for i in index]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._buffer[start:end].tobytes().decode("utf8")
+
+    def __repr__(self):
+        return f"SharedStringList(size={len(self)})"
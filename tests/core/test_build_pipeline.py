@@ -127,3 +127,69 @@ def test_simple_pipeline_graph():
         ],
     ).graph
     # assert_graph(graph, 2, 1, 10)
+
+
+def test_pipeline_cache(tmp_path):
+    automl = AutoML(
+        input=(Seq[Word],),
+        output=Document,
+        registry=[
+            WordToWordAlgorithm,
+            WordListToSentenceAlgorithm,
+            SentenceListToDocumentAlgorithm,
+        ],
+        pipeline_cache=tmp_path,
+    )
+
+    built = automl.make_pipeline_builder()
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    loaded = automl.make_pipeline_builder()
+    assert loaded is not built
+
+    def pipeline_nodes(space):
+        return {node for node in space.graph.nodes if hasattr(node, "algorithm")}
+
+    assert pipeline_nodes(loaded) == pipeline_nodes(built)
+
+    pipeline = loaded.sample()
+    assert [type(a).__name__ for a in pipeline.algorithms]
+
+
+def test_pipeline_cache_depends_on_max_list_depth(tmp_path):
+    def make_builder(max_list_depth):
+        automl = AutoML(
+            input=(Seq[Word],),
+            output=Document,
+            registry=[
+                WordToWordAlgorithm,
+                WordListToSentenceAlgorithm,
+                SentenceListToDocumentAlgorithm,
+            ],
+            pipeline_cache=tmp_path,
+            max_list_depth=max_list_depth,
+        )
+        return automl.make_pipeline_builder()
+
+    make_builder(1)
+    make_builder(3)
+
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+
+
+def test_build_pipeline_wraps_up_to_max_list_depth():
+    from autogoal.kb._algorithm import make_seq_algorithm
+
+    class FreshAlgorithm(AlgorithmBase):
+        def run(self, input: Word) -> Word:
+            pass
+
+    before = make_seq_algorithm.cache_info().misses
+    build_pipeline_graph(
+        input_types=(Word,),
+        output_type=Word,
+        registry=[FreshAlgorithm],
+        max_list_depth=2,
+    )
+
+    assert make_seq_algorithm.cache_info().misses - before == 2
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+
+from autogoal.grammar import generate_cfg, DiscreteValue
+from autogoal.search import RandomSearch, SearchCoordinator, SearchWorker
+from autogoal.utils import nice_repr
+
+
+@nice_repr
+class A:
+    def __init__(self, x: DiscreteValue(-10, 10), y: DiscreteValue(-10, 10)):
+        self.x = x
+        self.y = y
+
+
+def fn(a: A):
+    return a.x ** 2 + a.y ** 2
+
+
+def dying_fn(a: A):
+    # Simulates a worker killed (e.g., by the OOM killer) in the middle of a task
+    os._exit(1)
+
+
+def start_worker(coordinator, fitness_fn):
+    worker = SearchWorker(
+        generate_cfg(A), fitness_fn, coordinator.address, coordinator.authkey
+    )
+    process = multiprocessing.get_context("fork").Process(target=worker.run)
+    process.start()
+    return process
+
+
+def test_distributed_search_tolerates_dying_workers():
+    coordinator = SearchCoordinator(max_retries=10)
+    workers = [
+        start_worker(coordinator, dying_fn),
+        start_worker(coordinator, fn),
+        start_worker(coordinator, fn),
+    ]
+
+    try:
+        search = RandomSearch(
+            generate_cfg(A),
+            fn,
+            pop_size=6,
+            random_state=0,
+            evaluation_timeout=0,
+            memory_limit=0,
+            early_stop=None,
+            executor=coordinator,
+        )
+        best, best_fn = search.run(3)
+    finally:
+        coordinator.shutdown()
+
+    for process in workers:
+        process.join(5)
+
+    assert best_fn == fn(best)
+    assert len(coordinator.evaluation_times) == 3 * 6
+    assert workers[0].exitcode == 1
+    assert all(process.exitcode == 0 for process in workers[1:])
+
+
+def test_late_answers_do_not_consume_new_leases():
+    from concurrent.futures import Future
+    from autogoal.search._distributed import _Task
+
+    coordinator = SearchCoordinator()
+
+    try:
+        # Leased a second time after the first lease timed out
+        task = _Task(0, Future(), b"", {})
+        task.attempts = 2
+        coordinator._leases[0] = (task, None)
+
+        coordinator._complete(0, "ok", 1.0, 0.1, attempt=1)
+        assert not task.future.done()
+        assert 0 in coordinator._leases
+
+        coordinator._complete(0, "ok", 2.0, 0.1, attempt=2)
+        assert task.future.result() == 2.0
+        assert not coordinator._leases
+    finally:
+        coordinator.shutdown()
@@ -189,3 +189,12 @@ def test_sample_grammar():
 
     g = generate_cfg(A)
     assert str(g.sample()) == str(g())
+
+
+def test_grammars_are_cached_by_class_and_registry():
+    registry = [StemAlgorithm, TextAlgorithm]
+    grammar = generate_cfg(HigherStemAlgorithm, registry=registry)
+
+    assert generate_cfg(HigherStemAlgorithm, registry=list(registry)) is grammar
+    assert generate_cfg(HigherStemAlgorithm, registry=[StemAlgorithm]) is not grammar
+    assert isinstance(grammar.sample(), HigherStemAlgorithm)
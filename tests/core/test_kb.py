@@ -3,6 +3,9 @@ from autogoal.kb import (
     MatrixContinuous,
     MatrixContinuousDense,
     MatrixContinuousSparse,
+    Seq,
+    Word,
+    Sentence,
 )
 from autogoal.kb import AlgorithmBase
 
@@ -36,3 +39,22 @@ def test_exact_compatibilty():
 
 def test_subtype_compatibility():
     assert HigherInputAlgorithm.is_compatible_with([MatrixContinuousDense])
+
+
+def test_seq_match_checks_more_than_the_first_item():
+    words = ["hello"] * 500 + ["hello world"] * 500
+
+    assert not isinstance(words, Seq[Word])
+    assert isinstance(words, Seq[Sentence])
+    assert not isinstance([], Seq[Word])
+
+
+def test_data_frames_with_text_columns_are_categorical():
+    import pandas as pd
+    from autogoal.kb import MatrixCategorical, SemanticType
+
+    df = pd.DataFrame({"color": ["red", "blue"], "size": ["S", "M"]})
+
+    assert SemanticType.infer(df) == MatrixCategorical
+    assert SemanticType.infer(df.astype("category")) == MatrixCategorical
+    assert SemanticType.infer(df.assign(price=[1.5, 2.0])) == MatrixCategorical
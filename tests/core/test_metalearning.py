@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from autogoal.grammar import generate_cfg, CategoricalValue
+from autogoal.ml._metalearning import DatasetFeatureLogger, LearnerMedia
+from autogoal.search import PESearch
+from autogoal.utils import nice_repr
+
+
+@nice_repr
+class B:
+    def __init__(self, kind: CategoricalValue("good", "bad", "ugly")):
+        self.kind = kind
+
+
+def fn(b: B):
+    return 1.0 if b.kind == "good" else 0.1
+
+
+def test_warm_start_from_metalearning_log(tmp_path):
+    path = str(tmp_path / "metalearning.json")
+    X = np.random.RandomState(0).rand(50, 4)
+    grammar = generate_cfg(B)
+
+    search = PESearch(
+        grammar, fn, pop_size=10, random_state=0, evaluation_timeout=0, memory_limit=0
+    )
+    search.run(3, logger=DatasetFeatureLogger(X, output_file=path))
+
+    problem = DatasetFeatureLogger(X).extractor.extract_features(X)
+    model = LearnerMedia.from_file(problem, path).build_model()
+
+    assert model
+    weights = list(model.values())[0].weights
+    assert weights[0] > max(weights[1:])
+
+    warm = PESearch(
+        grammar,
+        fn,
+        pop_size=20,
+        epsilon_greed=0,
+        random_state=1,
+        initial_model=model,
+        evaluation_timeout=0,
+        memory_limit=0,
+    )
+    warm._start_generation()
+    kinds = [warm._generate().kind for _ in range(20)]
+    assert kinds.count("good") > 10
+
+
+def test_metalearning_log_with_batch_sampling(tmp_path):
+    path = str(tmp_path / "metalearning.json")
+    X = np.random.RandomState(0).rand(50, 4)
+
+    search = PESearch(
+        generate_cfg(B),
+        fn,
+        pop_size=10,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        batch_size=10,
+    )
+    search.run(2, logger=DatasetFeatureLogger(X, output_file=path))
+
+    with open(path) as fp:
+        solutions = [json.loads(line) for line in fp]
+
+    assert solutions
+    assert all(solution["pipeline_features"] for solution in solutions)
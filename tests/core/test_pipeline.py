@@ -5,7 +5,7 @@ from autogoal.contrib import find_classes
 from autogoal.ml import *
 from autogoal.kb import *
 from autogoal.utils import nice_repr
-from autogoal.grammar import Sampler
+from autogoal.grammar import DiscreteValue, Sampler
 
 
 class T1:
@@ -132,6 +132,126 @@ def test_when_pipeline_second_step_receives_two_input_one_from_previous_and_one_
     assert result == 121
 
 
+@nice_repr
+class CountingScaler(AlgorithmBase):
+    fits = 0
+
+    def __init__(self, factor: int):
+        self.factor = factor
+        self.train()
+
+    def train(self):
+        self._mode = "train"
+
+    def eval(self):
+        self._mode = "eval"
+
+    def run(self, x: int) -> float:
+        if self._mode == "train":
+            CountingScaler.fits += 1
+            self.scale_ = self.factor
+
+        return x * self.scale_
+
+
+@nice_repr
+class AddOne(AlgorithmBase):
+    def run(self, x: float) -> str:
+        return str(x + 1)
+
+
+def test_pipelines_sharing_a_prefix_reuse_cached_steps():
+    from autogoal.utils import StepCache
+
+    cache = StepCache()
+    CountingScaler.fits = 0
+    first = Pipeline([CountingScaler(2), AddOne()], input_types=[int])
+    second = Pipeline([CountingScaler(2), AddOne()], input_types=[int])
+    other = Pipeline([CountingScaler(3), AddOne()], input_types=[int])
+
+    for pipeline in [first, second, other]:
+        pipeline.send("train")
+        pipeline.run(5, cache=cache, cache_key="fold-0")
+        pipeline.send("eval")
+        assert pipeline.run(7, cache=cache, cache_key="test-0") == str(
+            7 * pipeline.algorithms[0].factor + 1
+        )
+
+    assert CountingScaler.fits == 2
+    # The pipelines' own steps are untouched, the fitted ones live in the cache
+    assert not hasattr(first.algorithms[0], "scale_")
+
+
+@nice_repr
+class HiddenFactor(AlgorithmBase):
+    def __init__(self, factor: DiscreteValue(1, 10)):
+        # Not stored under its parameter name, so it's not part of the `repr`
+        self._factor = factor
+
+    def run(self, x: int) -> float:
+        return x * self._factor
+
+
+def test_sampled_steps_with_the_same_repr_are_cached_apart():
+    from autogoal.utils import StepCache
+
+    builder = build_pipeline_graph(
+        input_types=(int,), output_type=str, registry=[HiddenFactor, AddOne]
+    )
+    sampler = Sampler(random_state=0)
+    pipelines = {}
+
+    while len(pipelines) < 2:
+        pipeline = builder.sample(sampler=sampler)
+        pipelines.setdefault(pipeline.algorithms[0]._factor, pipeline)
+
+    first, second = pipelines.values()
+    assert repr(first) == repr(second)
+
+    cache = StepCache()
+
+    for pipeline in [first, second]:
+        assert pipeline.run(5, cache=cache, cache_key="fold-0") == str(
+            5 * pipeline.algorithms[0]._factor + 1
+        )
+
+
+def test_messages_do_not_change_cached_steps():
+    from autogoal.utils import StepCache
+
+    cache = StepCache()
+    first = Pipeline([CountingScaler(2), AddOne()], input_types=[int])
+    second = Pipeline([CountingScaler(2), AddOne()], input_types=[int])
+
+    for pipeline in [first, second]:
+        pipeline.send("train")
+        pipeline.run(5, cache=cache, cache_key="fold-0")
+
+    first.send("eval")
+
+    cached, _ = cache.get(first._train_keys[0])
+    assert cached._mode == "train"
+    assert second._fitted[0]._mode == "train"
+
+
+def test_pipeline_profiles_every_step():
+    pipeline = Pipeline([CountingScaler(2), AddOne()], input_types=[int])
+    profile = []
+
+    pipeline.send("train")
+    pipeline.run(5, profile=profile)
+    pipeline.send("eval")
+    pipeline.run(7, profile=profile)
+
+    assert [(p.algorithm, p.mode) for p in profile] == [
+        ("CountingScaler", "train"),
+        ("AddOne", "train"),
+        ("CountingScaler", "eval"),
+        ("AddOne", "eval"),
+    ]
+    assert all(p.wall_time >= 0 and p.output_size > 0 for p in profile)
+
+
 class A(AlgorithmBase):
     def run(self, x: MatrixContinuous):
         pass
@@ -146,3 +266,91 @@ def test_automl_finds_classifiers():
     builder = automl.make_pipeline_builder()
 
     assert len(builder.graph) > 10
+
+
+def test_fitness_cache_depends_on_objectives(tmp_path):
+    X, y = np.ones((4, 2)), np.asarray(["A", "B"] * 2)
+
+    def namespace(**kwargs):
+        automl = AutoML(fitness_cache=str(tmp_path / "cache.db"), **kwargs)
+        return automl.make_fitness_cache(X, y).namespace
+
+    assert namespace() != namespace(objectives=("latency",))
+    assert namespace() != namespace(step_cache=1024)
+
+
+class FailingAlgorithm(AlgorithmBase):
+    def run(
+        self, x: MatrixContinuous, y: Supervised[VectorCategorical]
+    ) -> VectorCategorical:
+        raise ValueError("always fails")
+
+
+def test_automl_with_objectives_fails_without_pareto_front():
+    automl = AutoML(
+        input=(MatrixContinuous, Supervised[VectorCategorical]),
+        output=VectorCategorical,
+        registry=[FailingAlgorithm],
+        objectives=("latency",),
+        search_iterations=2,
+        pop_size=2,
+        evaluation_timeout=0,
+        memory_limit=0,
+    )
+
+    with pytest.raises(ValueError, match="No pipeline"):
+        automl.fit(np.random.rand(10, 2), np.asarray(["A", "B"] * 5))
+
+
+class AllocatingAlgorithm(AlgorithmBase):
+    def __init__(self, size):
+        self.size = size
+
+    def run(
+        self, x: MatrixContinuous, y: Supervised[VectorCategorical]
+    ) -> VectorCategorical:
+        self.data_ = b"x" * self.size
+        return np.asarray(["A"] * len(x))
+
+
+def test_memory_objective_measures_growth_after_an_earlier_peak():
+    from autogoal.ml.metrics import accuracy
+
+    X, y = np.random.rand(10, 2), np.asarray(["A", "B"] * 5)
+
+    def memory(size):
+        pipeline = Pipeline(
+            [AllocatingAlgorithm(size)],
+            input_types=[MatrixContinuous, Supervised[VectorCategorical]],
+        )
+        _, memory = accuracy(pipeline, X, y, objectives=("memory",))
+        return memory
+
+    assert memory(2 ** 28) > 2 ** 27
+    # The process already peaked higher, but the growth is measured all the same
+    assert memory(2 ** 26) > 2 ** 25
+
+
+class SizeRecorder(AlgorithmBase):
+    sizes = []
+
+    def run(
+        self, x: MatrixContinuous, y: Supervised[VectorCategorical]
+    ) -> VectorCategorical:
+        SizeRecorder.sizes.append(len(x))
+        return np.asarray(["A"] * len(x))
+
+
+def test_low_budgets_keep_both_splits_non_empty():
+    from autogoal.ml.metrics import accuracy
+
+    X, y = np.random.rand(20, 2), np.asarray(["A", "B"] * 10)
+    pipeline = Pipeline(
+        [SizeRecorder()], input_types=[MatrixContinuous, Supervised[VectorCategorical]]
+    )
+    SizeRecorder.sizes = []
+
+    accuracy(pipeline, X, y, budget=0.05, cross_validation_steps=1)
+
+    train, test = SizeRecorder.sizes
+    assert train > 0 and test > 0
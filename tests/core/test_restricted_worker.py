@@ -1,4 +1,4 @@
-from autogoal.utils import RestrictedWorkerByJoin, Gb, Mb
+from autogoal.utils import RestrictedWorkerByJoin, RestrictedWorkerPool, Gb, Mb
 import time
 import numpy as np
 import pytest
@@ -28,6 +28,16 @@ def test_restrict_time():
         fn(2, 1024)
 
 
+def test_zero_timeout_expires_right_away():
+    fn = RestrictedWorkerByJoin(func, timeout=None, memory=None)
+    start = time.time()
+
+    with pytest.raises(TimeoutError):
+        fn.run_with_timeout(0, 2, 1024)
+
+    assert time.time() - start < 1
+
+
 def test_handles_exc():
     fn = RestrictedWorkerByJoin(func, timeout=None, memory=None)
 
@@ -60,3 +70,67 @@ def test_restrict_memory_fails():
         pass
 
     assert isinstance(e.value, ValueError)
+
+
+def worker_pid(*args):
+    import os
+
+    func(*args)
+    return os.getpid()
+
+
+def test_pool_reuses_workers():
+    fn = RestrictedWorkerPool(worker_pid, timeout=None, memory=None)
+
+    try:
+        assert fn(0) == fn(0)
+    finally:
+        fn.shutdown()
+
+
+def test_pool_recycles_after_max_tasks():
+    fn = RestrictedWorkerPool(worker_pid, timeout=None, memory=None, max_tasks=2)
+
+    try:
+        pids = [fn(0) for _ in range(4)]
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+    finally:
+        fn.shutdown()
+
+
+def test_pool_restrict_time():
+    fn = RestrictedWorkerPool(worker_pid, timeout=1, memory=None)
+
+    try:
+        with pytest.raises(TimeoutError):
+            fn(2)
+
+        # A new worker replaces the one that timed out
+        fn(0)
+    finally:
+        fn.shutdown()
+
+
+def test_pool_handles_exc():
+    fn = RestrictedWorkerPool(worker_pid, timeout=None, memory=None)
+
+    try:
+        with pytest.raises(Exception) as e:
+            fn(0, 0, True)
+
+        assert str(e.value).startswith("You asked for it.")
+    finally:
+        fn.shutdown()
+
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="Requires RLIMIT_DATA")
+def test_pool_restrict_memory():
+    fn = RestrictedWorkerPool(worker_pid, timeout=None, memory=1 * Gb)
+
+    try:
+        with pytest.raises(MemoryError):
+            fn(0, 10 ** 8)
+
+        fn(0)
+    finally:
+        fn.shutdown()
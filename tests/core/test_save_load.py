@@ -48,6 +48,16 @@ def test_search_is_replayable_from_grammar():
     assert best == best_clone
 
 
+def test_pickled_sampler_replays_options_by_index():
+    grammar = generate_cfg(DummyAlgorithm)
+    search = RandomSearch(generator_fn=grammar, fitness_fn=lambda a: 0)
+    best, _ = search.run(1)
+
+    # Only the index of the chosen option travels, not the option itself
+    sampler = loads(dumps(best.sampler_))
+    assert repr(grammar(sampler.replay())) == repr(best)
+
+
 def fn2(sampler):
     return sampler.discrete(0, 10)
 
@@ -59,7 +69,7 @@ def test_search_is_replayable_from_fitness_no_multiprocessing():
     sampler = best.sampler_.replay()
 
     assert best is sampler
-    assert sampler._history != []
+    assert len(sampler) > 0
     assert best_fn == fn2(sampler)
 
 
@@ -0,0 +1,673 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from autogoal.grammar import generate_cfg, DiscreteValue, CategoricalValue, BooleanValue
+from autogoal.search import PESearch, RandomSearch, AsyncPESearch
+from autogoal.utils import nice_repr, FitnessCache
+
+
+@nice_repr
+class A:
+    def __init__(self, x: DiscreteValue(-10, 10), y: DiscreteValue(-10, 10)):
+        self.x = x
+        self.y = y
+
+
+def fn(a: A):
+    return a.x ** 2 + a.y ** 2
+
+
+def slow_fn(a: A):
+    # Cheap pipelines finish first, so completion order differs from sampling order
+    time.sleep(0.01 * (abs(a.x) % 3))
+    return fn(a)
+
+
+class RecordingPESearch(PESearch):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history = []
+
+    def _finish_generation(self, fns):
+        self.history.append(list(fns))
+        super()._finish_generation(fns)
+
+
+def test_parallel_search_reports_fitness_in_sampling_order():
+    grammar = generate_cfg(A)
+
+    sequential = RecordingPESearch(
+        grammar,
+        slow_fn,
+        pop_size=6,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+    )
+    parallel = RecordingPESearch(
+        grammar,
+        slow_fn,
+        pop_size=6,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        n_jobs=4,
+    )
+
+    best_seq, fn_seq = sequential.run(4)
+    best_par, fn_par = parallel.run(4)
+
+    assert sequential.history == parallel.history
+    assert fn_seq == fn_par
+
+
+def test_parallel_search_with_restricted_workers():
+    grammar = generate_cfg(A)
+    search = RandomSearch(grammar, fn, pop_size=4, random_state=0, n_jobs=2)
+    best, best_fn = search.run(2)
+
+    assert best_fn == fn(best)
+
+
+def test_parallel_search_forks_from_the_main_thread(monkeypatch):
+    started = []
+    start = multiprocessing.Process.start
+
+    def recording_start(process):
+        started.append(threading.current_thread() is threading.main_thread())
+        start(process)
+
+    monkeypatch.setattr(multiprocessing.Process, "start", recording_start)
+
+    grammar = generate_cfg(A)
+    search = RandomSearch(grammar, fn, pop_size=4, random_state=0, n_jobs=2)
+    best, best_fn = search.run(1)
+
+    assert best_fn == fn(best)
+    assert started and all(started)
+
+
+def test_search_with_persistent_workers():
+    grammar = generate_cfg(A)
+    search = RandomSearch(
+        grammar, fn, pop_size=4, random_state=0, n_jobs=2, persistent_workers=True
+    )
+    best, best_fn = search.run(2)
+
+    assert best_fn == fn(best)
+
+
+def test_fitness_cache_is_reused_across_runs(tmp_path):
+    grammar = generate_cfg(A)
+    calls = []
+
+    def counting_fn(a: A):
+        calls.append(repr(a))
+        return fn(a)
+
+    def run():
+        cache = FitnessCache(tmp_path / "cache.pickle")
+        search = RandomSearch(
+            grammar,
+            counting_fn,
+            pop_size=5,
+            random_state=0,
+            evaluation_timeout=0,
+            memory_limit=0,
+            fitness_cache=cache,
+        )
+        return search.run(2)
+
+    first = run()
+    evaluated = len(calls)
+    second = run()
+
+    assert evaluated > 0
+    assert len(calls) == evaluated
+    assert first[1] == second[1]
+
+
+def test_async_search_keeps_evaluating_without_barriers():
+    grammar = generate_cfg(A)
+    calls = []
+
+    def counting_fn(a: A):
+        calls.append(repr(a))
+        return slow_fn(a)
+
+    search = AsyncPESearch(
+        grammar,
+        counting_fn,
+        pop_size=5,
+        maximize=False,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+        n_jobs=3,
+    )
+    best, best_fn = search.run(4)
+
+    assert best_fn == fn(best)
+    # Evaluations still running when the last generation ends are abandoned
+    assert 4 * 5 <= len(calls) <= 4 * 5 + 2
+    assert search._model
+
+
+def test_async_search_rejects_multi_fidelity():
+    with pytest.raises(ValueError):
+        AsyncPESearch(generate_cfg(A), fn, min_budget=1 / 9)
+
+
+def test_multi_fidelity_search_promotes_best_candidates():
+    grammar = generate_cfg(A)
+    budgets = []
+
+    def budget_fn(a: A, budget=1.0):
+        budgets.append(budget)
+        # Low budgets are noisy estimates of the full fitness
+        return fn(a) + (1 - budget) * a.x
+
+    search = RandomSearch(
+        grammar,
+        budget_fn,
+        pop_size=9,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+        min_budget=1 / 9,
+        eta=3,
+    )
+    best, best_fn = search.run(2)
+
+    # First bracket goes through budgets 1/9, 1/3 and 1, the second starts at 1/3
+    assert budgets.count(1 / 9) == 9
+    assert budgets.count(1 / 3) == 3 + 9
+    assert budgets.count(1.0) == 1 + 3
+    assert best_fn == fn(best)
+
+
+def test_multi_fidelity_search_stops_at_search_timeout():
+    budgets = []
+
+    def slow_fn(a: A, budget=1.0):
+        budgets.append(budget)
+        time.sleep(0.1)
+        return fn(a)
+
+    search = RandomSearch(
+        generate_cfg(A),
+        slow_fn,
+        pop_size=9,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        search_timeout=0.5,
+        min_budget=1 / 9,
+        eta=3,
+    )
+    search.run(1)
+
+    # Candidates discarded at the first rung already exceed the search timeout
+    assert budgets == [1 / 9] * 9
+
+
+def test_racing_prunes_hopeless_candidates():
+    from autogoal.exceptions import PrunedEvaluation
+    from autogoal.search import MemoryLogger
+
+    grammar = generate_cfg(A)
+    pruned = []
+
+    class PruneLogger(MemoryLogger):
+        def prune_solution(self, solution, fitness):
+            pruned.append((solution, fitness))
+
+    def racing_fn(a: A, best_fitness=None):
+        if best_fitness is not None and a.x < best_fitness:
+            raise PrunedEvaluation(a.x)
+
+        return a.x
+
+    search = RandomSearch(
+        grammar, racing_fn, pop_size=10, random_state=0, racing=True, early_stop=None
+    )
+    best, best_fn = search.run(2, logger=PruneLogger())
+
+    assert pruned
+    assert all(fitness < best_fn for _, fitness in pruned)
+    assert best_fn == best.x
+
+
+def test_console_logger_reports_pruned_evaluations(capsys, monkeypatch):
+    from autogoal.exceptions import PrunedEvaluation
+    from autogoal.search import ConsoleLogger
+
+    def racing_fn(a: A, best_fitness=None):
+        if best_fitness is not None and a.x < best_fitness:
+            raise PrunedEvaluation(a.x)
+
+        return a.x
+
+    # Colors are only applied on a TTY otherwise
+    monkeypatch.setenv("FORCE_COLOR", "1")
+
+    search = RandomSearch(
+        generate_cfg(A), racing_fn, pop_size=10, random_state=0, racing=True
+    )
+    search.run(2, logger=ConsoleLogger())
+
+    assert "Pruned evaluation" in capsys.readouterr().out
+
+
+def test_search_resumes_from_checkpoint(tmp_path):
+    grammar = generate_cfg(A)
+    checkpoint = str(tmp_path / "search.ckpt")
+
+    def make_search(fitness_fn=fn, **kwargs):
+        return RecordingPESearch(
+            grammar,
+            fitness_fn,
+            pop_size=5,
+            random_state=0,
+            evaluation_timeout=0,
+            memory_limit=0,
+            early_stop=None,
+            **kwargs,
+        )
+
+    full = make_search()
+    expected = full.run(4)
+
+    calls = []
+
+    def dying_fn(a: A):
+        # Dies in the middle of the third generation
+        calls.append(a)
+
+        if len(calls) > 12:
+            raise KeyboardInterrupt()
+
+        return fn(a)
+
+    interrupted = make_search(dying_fn, checkpoint=checkpoint)
+    interrupted.run(4)
+
+    resumed = make_search(checkpoint=checkpoint)
+    result = resumed.run(resume_from=checkpoint)
+
+    assert interrupted.history + resumed.history == full.history
+    assert repr(result[0]) == repr(expected[0])
+    assert result[1] == expected[1]
+
+
+def test_multi_fidelity_search_resumes_from_checkpoint(tmp_path):
+    from autogoal.search import CostModel
+
+    grammar = generate_cfg(A)
+    checkpoint = str(tmp_path / "search.ckpt")
+
+    def budget_fn(a: A, budget=1.0):
+        return fn(a)
+
+    def make_search(fitness_fn=budget_fn, **kwargs):
+        return RecordingPESearch(
+            grammar,
+            fitness_fn,
+            pop_size=9,
+            maximize=False,
+            random_state=0,
+            evaluation_timeout=0,
+            memory_limit=0,
+            early_stop=None,
+            min_budget=1 / 9,
+            eta=3,
+            cost_model=CostModel(min_samples=1000),
+            **kwargs,
+        )
+
+    full = make_search()
+    expected = full.run(4)
+
+    calls = []
+
+    def dying_fn(a: A, budget=1.0):
+        # Dies in the middle of the third generation (bracket)
+        calls.append(a)
+
+        if len(calls) > 13 + 12 + 5:
+            raise KeyboardInterrupt()
+
+        return fn(a)
+
+    interrupted = make_search(dying_fn, checkpoint=checkpoint)
+    interrupted.run(4)
+
+    resumed = make_search(checkpoint=checkpoint)
+    result = resumed.run(resume_from=checkpoint)
+
+    assert interrupted.history + resumed.history == full.history
+    assert result[1] == expected[1]
+    assert resumed._bracket == full._bracket
+    # The cost model keeps learning from the evaluations before the interruption
+    assert len(resumed._cost_model._times) == len(full._cost_model._times)
+
+
+def test_batch_sampling_is_replay_compatible():
+    grammar = generate_cfg(A)
+
+    search = PESearch(
+        grammar,
+        fn,
+        pop_size=10,
+        maximize=False,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+        batch_size=10,
+    )
+    best, best_fn = search.run(5)
+
+    assert best_fn == fn(best)
+    assert search._model
+    # Solutions sampled in batch are replayed like any other
+    assert repr(grammar(best.sampler_.replay())) == repr(best)
+
+
+def test_surrogate_search_screens_candidates():
+    from autogoal.search import SurrogateSearch
+
+    grammar = generate_cfg(A)
+    evaluated = []
+
+    def counting_fn(a: A):
+        evaluated.append(a)
+        return fn(a)
+
+    search = SurrogateSearch(
+        grammar,
+        counting_fn,
+        pop_size=5,
+        maximize=False,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+        candidates=20,
+    )
+    best, best_fn = search.run(4)
+
+    # Only the selected candidate of each slot is evaluated and learned from
+    assert len(evaluated) == 4 * 5
+    assert len(search._samplers) == 5
+    assert len(search.training_y) == 4 * 5
+    assert best_fn == fn(best)
+
+
+def test_cost_model_adapts_timeouts():
+    from autogoal.search import CostModel
+
+    grammar = generate_cfg(A)
+    cost_model = CostModel(min_samples=3, min_timeout=0.5)
+    timeouts = []
+
+    class RecordingSearch(RandomSearch):
+        def _call_fitness(self, solution, **kwargs):
+            timeouts.append(cost_model.timeout(solution, self._evaluation_timeout))
+            return super()._call_fitness(solution, **kwargs)
+
+    search = RecordingSearch(
+        grammar,
+        fn,
+        pop_size=3,
+        random_state=0,
+        evaluation_timeout=30,
+        memory_limit=0,
+        early_stop=None,
+        cost_model=cost_model,
+    )
+    best, best_fn = search.run(2)
+
+    # Fast evaluations get the minimum timeout once there are enough observations
+    assert timeouts == [30] * 3 + [0.5] * 3
+    assert best_fn == fn(best)
+
+
+def test_cost_model_only_learns_from_completed_evaluations():
+    from autogoal.search import CostModel
+
+    grammar = generate_cfg(A)
+    cost_model = CostModel(min_samples=1000)
+
+    def failing_fn(a: A):
+        if a.x % 2:
+            raise ValueError("odd")
+
+        return fn(a)
+
+    search = RandomSearch(
+        grammar,
+        failing_fn,
+        pop_size=10,
+        random_state=0,
+        errors="ignore",
+        evaluation_timeout=0,
+        memory_limit=0,
+        cost_model=cost_model,
+    )
+    search.run(1)
+
+    assert len(cost_model._times) == len([s for s in search._evaluated if s.x % 2 == 0])
+
+
+def test_cost_model_does_not_start_evaluations_after_search_timeout():
+    import psutil
+    from autogoal.search import CostModel
+
+    def slow_fn(a: A):
+        time.sleep(5)
+        return fn(a)
+
+    search = RandomSearch(
+        generate_cfg(A),
+        slow_fn,
+        pop_size=4,
+        random_state=0,
+        errors="ignore",
+        n_jobs=2,
+        evaluation_timeout=1,
+        memory_limit=0,
+        search_timeout=1,
+        cost_model=CostModel(),
+    )
+    before = set(psutil.Process().children(recursive=True))
+    search.run(5)
+    # Terminated evaluations are reaped in the background
+    time.sleep(1)
+
+    # Evaluations are stopped at the deadline, and no new ones are started after it
+    assert set(psutil.Process().children(recursive=True)) <= before
+
+
+def test_multi_objective_search_keeps_pareto_front():
+    from autogoal.sampling import dominates
+
+    grammar = generate_cfg(A)
+
+    def objectives(a: A):
+        return (a.x, abs(a.y))
+
+    search = PESearch(
+        grammar,
+        objectives,
+        pop_size=10,
+        maximize=(True, False),
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+    )
+    front, fns = search.run(3)
+
+    assert len(front) == len(fns) > 0
+    assert all(objectives(a) == fn for a, fn in zip(front, fns))
+    assert not any(dominates(a, b, (True, False)) for a in fns for b in fns)
+
+
+def test_console_logger_reports_multi_objective_fitness(capsys):
+    from autogoal.search import ConsoleLogger
+
+    search = PESearch(
+        generate_cfg(A),
+        lambda a: (a.x, abs(a.y)),
+        pop_size=5,
+        maximize=(True, False),
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+    )
+    search.run(2, logger=ConsoleLogger())
+
+    assert "Search completed" in capsys.readouterr().out
+
+
+@nice_repr
+class Small:
+    def __init__(self, kind: CategoricalValue("a", "b", "c"), flag: BooleanValue()):
+        self.kind = kind
+        self.flag = flag
+
+
+def test_pesearch_learns_from_evaluated_candidates_only():
+    def small_fn(s: Small):
+        return float(s.kind == "a")
+
+    class CheckingPESearch(PESearch):
+        def _finish_generation(self, fns):
+            # Duplicates are discarded after their sampler was built
+            assert len(self._samplers) > len(fns)
+            assert [small_fn(s) for s in self._evaluated] == fns
+            super()._finish_generation(fns)
+
+    search = CheckingPESearch(
+        generate_cfg(Small),
+        small_fn,
+        pop_size=10,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+        allow_duplicates=False,
+    )
+    best, best_fn = search.run(2)
+
+    assert best_fn == 1.0
+
+
+def test_surrogate_search_learns_from_actual_evaluations_only():
+    from autogoal.search import SurrogateSearch
+
+    evaluated = []
+
+    def counting_fn(s: Small):
+        evaluated.append(s)
+        return float(s.kind == "a")
+
+    def make_search():
+        return SurrogateSearch(
+            generate_cfg(Small),
+            counting_fn,
+            pop_size=5,
+            random_state=0,
+            evaluation_timeout=0,
+            memory_limit=0,
+            early_stop=None,
+            fitness_cache=FitnessCache(),
+            candidates=3,
+        )
+
+    search = make_search()
+    search.run(4)
+
+    # There are only 6 configurations, repeated ones are cache hits
+    assert len(search.training_y) == len(evaluated) <= 6
+
+    resumed = make_search()
+    resumed._set_state(search._get_state())
+    assert resumed.training_y == search.training_y
+
+
+def test_grid_search_enumerates_without_repetitions():
+    from autogoal.search import GridSearch
+
+    evaluated = []
+
+    def counting_fn(s: Small):
+        evaluated.append(repr(s))
+        return len(evaluated)
+
+    search = GridSearch(
+        generate_cfg(Small),
+        counting_fn,
+        pop_size=4,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+    )
+    search.run(100)
+
+    assert len(evaluated) == 6
+    assert len(set(evaluated)) == 6
+
+
+def test_profiles_are_reported_to_loggers():
+    from autogoal.search import ProfileLogger
+    from autogoal.utils import EvaluationResult, StepProfile
+
+    def profiled_fn(a: A):
+        return EvaluationResult(fn(a), [StepProfile("A", "train", 0.5, 0.5, 0, 8)])
+
+    logger = ProfileLogger()
+    search = PESearch(
+        generate_cfg(A),
+        profiled_fn,
+        pop_size=5,
+        maximize=False,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+    )
+    best, best_fn = search.run(2, logger=logger)
+
+    # Only the fitness is kept by the search
+    assert best_fn == fn(best)
+    assert logger.stats[("A", "train")][0] == 10
+
+
+def test_json_lines_logger_streams_every_evaluation(tmp_path):
+    from autogoal.search import JsonLinesLogger, read_json_lines
+
+    path = str(tmp_path / "search.jsonl")
+    search = PESearch(
+        generate_cfg(A),
+        fn,
+        pop_size=5,
+        maximize=False,
+        random_state=0,
+        evaluation_timeout=0,
+        memory_limit=0,
+        early_stop=None,
+    )
+    best, best_fn = search.run(2, logger=JsonLinesLogger(path, flush_every=3))
+
+    records = list(read_json_lines(path, event="eval"))
+    assert len(records) == 10
+    assert all(r["digest"] and r["duration"] >= 0 for r in records)
+    assert min(r["fitness"] for r in records) == best_fn
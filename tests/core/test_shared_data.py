@@ -0,0 +1,72 @@
+import numpy as np
+import scipy.sparse as sp
+
+from autogoal.grammar import CategoricalValue
+from autogoal.kb import AlgorithmBase, MatrixContinuous, Supervised, VectorCategorical
+from autogoal.ml import AutoML
+from autogoal.utils import RestrictedWorkerPool, SharedData, nice_repr
+
+
+def total(data: SharedData):
+    value = data.value
+    return float(value.sum()), (
+        value.flags.writeable if hasattr(value, "flags") else None
+    )
+
+
+def test_workers_attach_read_only_views():
+    dense = SharedData(np.arange(12, dtype=float).reshape(3, 4))
+    fn = RestrictedWorkerPool(total, timeout=None, memory=None)
+
+    try:
+        assert fn(dense) == (66.0, False)
+    finally:
+        fn.shutdown()
+        dense.close()
+
+
+def test_share_csr_matrix():
+    X = sp.random(20, 10, density=0.2, format="csr", random_state=0)
+    shared = SharedData(X)
+
+    try:
+        assert abs(shared.value - X).sum() == 0
+        assert shared.value[[0, 1]].shape == (2, 10)
+    finally:
+        shared.close()
+
+
+@nice_repr
+class DummyAlgorithm(AlgorithmBase):
+    def __init__(self, x: CategoricalValue("A", "B")):
+        self.x = x
+
+    def train(self):
+        pass
+
+    def eval(self):
+        pass
+
+    def run(
+        self, x: MatrixContinuous, y: Supervised[VectorCategorical]
+    ) -> VectorCategorical:
+        return np.asarray(["A"] * x.shape[0])
+
+
+def test_automl_with_shared_memory():
+    X = np.random.rand(30, 4)
+    y = np.asarray(["A", "B", "A"] * 10)
+
+    automl = AutoML(
+        input=(MatrixContinuous, Supervised[VectorCategorical]),
+        output=VectorCategorical,
+        registry=[DummyAlgorithm],
+        search_iterations=2,
+        pop_size=2,
+        shared_memory=True,
+        persistent_workers=True,
+    )
+    automl.fit(X, y)
+
+    assert automl.best_score_ > 0
+    assert not hasattr(automl, "_shared_data")